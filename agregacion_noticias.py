@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import serializacion
+from catalogo_descargas import ARCHIVO_CATALOGO, CatalogoDescargas
+from lectura_notas import LectorNotas
+from planificador_consultas import CAMPO_COINCIDENCIAS, PALABRAS_PERMITIDAS, normalizar_palabras, palabras_en_texto
+
+LONGITUD_TITULO = 120
+
+def palabras_del_archivo(cabecera):
+    """Palabras buscadas según la cabecera del archivo (parámetros o filtros de la API)"""
+    parametros = cabecera.get('parametros_busqueda') or {}
+    if parametros.get('palabras'):
+        return normalizar_palabras(parametros['palabras'])
+    filtros = cabecera.get('filtros') or {}
+    if filtros.get('palabrasBuscadas'):
+        return normalizar_palabras(filtros['palabrasBuscadas'])
+    return list(PALABRAS_PERMITIDAS)
+
+def agregar_archivo(ruta):
+    """Recorre un archivo en streaming y devuelve su agregado parcial
+
+    Cuenta notas por día, fuente, programa y palabra clave, y guarda un hash de
+    8 bytes de cada 'id' y de cada título (con su número de apariciones) para
+    poder detectar después los repetidos entre archivos.
+    """
+    inicio = time.perf_counter()
+    lector = LectorNotas(ruta)
+    por_dia = Counter()
+    por_fuente = Counter()
+    por_programa = Counter()
+    por_palabra = Counter()
+    titulos = {}  # hash del título -> [apariciones, título recortado]
+    ids = set()
+    total = 0
+    palabras = None
+
+    for nota in lector:
+        total += 1
+        if palabras is None:
+            # La cabecera ya está leída al llegar a la primera nota (NDJSON o JSON con metadatos primero)
+            palabras = palabras_del_archivo(lector.cabecera)
+
+        por_dia[str(nota.get('fecha') or 'Sin fecha')[:10]] += 1
+        por_fuente[nota.get('fuente') or 'Sin fuente'] += 1
+        por_programa[nota.get('nombre_programa') or 'Sin programa'] += 1
+
+        # Las etiquetas del planificador evitan buscar las palabras en el texto
+        coincidencias = nota.get(CAMPO_COINCIDENCIAS)
+        if coincidencias is None:
+            coincidencias = palabras_en_texto(nota, palabras)
+        por_palabra.update(coincidencias)
+
+        if 'id' in nota:
+            ids.add(hashlib.blake2b(str(nota['id']).encode('utf-8'), digest_size=8).digest())
+        if 'titulo' in nota:
+            clave = hashlib.blake2b(str(nota['titulo']).encode('utf-8'), digest_size=8).digest()
+            entrada = titulos.get(clave)
+            if entrada is None:
+                titulos[clave] = [1, str(nota['titulo'])[:LONGITUD_TITULO]]
+            else:
+                entrada[0] += 1
+
+    return {
+        'archivos': [ruta],
+        'total': total,
+        'por_dia': por_dia,
+        'por_fuente': por_fuente,
+        'por_programa': por_programa,
+        'por_palabra': por_palabra,
+        'titulos': titulos,
+        'ids': ids,
+        'segundos': time.perf_counter() - inicio
+    }
+
+def agregado_vacio():
+    return {
+        'archivos': [],
+        'total': 0,
+        'por_dia': Counter(),
+        'por_fuente': Counter(),
+        'por_programa': Counter(),
+        'por_palabra': Counter(),
+        'titulos': {},  # hash -> [apariciones, título, archivos en los que aparece]
+        'ids': set(),
+        'apariciones_ids': 0,
+        'segundos': 0.0
+    }
+
+def fusionar(agregado, parcial):
+    """Suma un agregado parcial al total (modifica y devuelve 'agregado')"""
+    agregado['archivos'].extend(parcial['archivos'])
+    agregado['total'] += parcial['total']
+    for campo in ('por_dia', 'por_fuente', 'por_programa', 'por_palabra'):
+        agregado[campo].update(parcial[campo])
+    for clave, (apariciones, titulo) in parcial['titulos'].items():
+        entrada = agregado['titulos'].get(clave)
+        if entrada is None:
+            agregado['titulos'][clave] = [apariciones, titulo, 1]
+        else:
+            entrada[0] += apariciones
+            entrada[2] += 1
+    agregado['apariciones_ids'] += len(parcial['ids'])
+    agregado['ids'] |= parcial['ids']
+    agregado['segundos'] += parcial['segundos']
+    return agregado
+
+def agregar_archivos(rutas, procesos=None):
+    """Agrega varios archivos en un pool de procesos y fusiona los parciales según terminan
+
+    Con procesos=1 se procesan en serie en el proceso actual.
+    """
+    agregado = agregado_vacio()
+    if procesos == 1 or len(rutas) <= 1:
+        for ruta in rutas:
+            fusionar(agregado, agregar_archivo(ruta))
+            print(f"   ✅ {ruta}")
+        return agregado
+
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = {executor.submit(agregar_archivo, ruta): ruta for ruta in rutas}
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            fusionar(agregado, futuro.result())
+            print(f"   ✅ {i}/{len(rutas)} {futuros[futuro]}")
+    return agregado
+
+def resumen(agregado, top=10):
+    """Convierte el agregado en un diccionario serializable con los rankings principales"""
+    repetidos = [entrada for entrada in agregado['titulos'].values() if entrada[0] > 1]
+    entre_archivos = [entrada for entrada in repetidos if entrada[2] > 1]
+    return {
+        'archivos': sorted(agregado['archivos']),
+        'total_noticias': agregado['total'],
+        'ids_unicos': len(agregado['ids']),
+        'ids_en_varios_archivos': agregado['apariciones_ids'] - len(agregado['ids']),
+        'titulos_unicos': len(agregado['titulos']),
+        'titulos_repetidos': len(repetidos),
+        'titulos_repetidos_entre_archivos': len(entre_archivos),
+        'por_dia': dict(sorted(agregado['por_dia'].items())),
+        'por_fuente': dict(agregado['por_fuente'].most_common()),
+        'por_programa': dict(agregado['por_programa'].most_common()),
+        'por_palabra': dict(agregado['por_palabra'].most_common()),
+        'titulos_mas_repetidos': [
+            {'titulo': titulo, 'apariciones': apariciones, 'archivos': archivos}
+            for apariciones, titulo, archivos in sorted(repetidos, key=lambda e: e[0], reverse=True)[:top]
+        ]
+    }
+
+def mostrar_resumen(datos, top=10):
+    print(f"\n📊 AGREGADO DE {len(datos['archivos'])} ARCHIVOS:")
+    print(f"   Noticias: {datos['total_noticias']}")
+    print(f"   IDs únicos: {datos['ids_unicos']} ({datos['ids_en_varios_archivos']} repetidos entre archivos)")
+    print(f"   Títulos únicos: {datos['titulos_unicos']} "
+          f"({datos['titulos_repetidos']} repetidos, {datos['titulos_repetidos_entre_archivos']} entre archivos)")
+
+    print(f"\n📅 NOTICIAS POR DÍA:")
+    for dia, cantidad in datos['por_dia'].items():
+        print(f"   {dia}: {cantidad} noticias")
+    for titulo, campo in (('📺 POR FUENTE', 'por_fuente'), ('🎙️  POR PROGRAMA', 'por_programa'),
+                          ('🔑 POR PALABRA CLAVE', 'por_palabra')):
+        print(f"\n{titulo}:")
+        for nombre, cantidad in list(datos[campo].items())[:top]:
+            print(f"   {nombre}: {cantidad}")
+
+    if datos['titulos_mas_repetidos']:
+        print(f"\n📋 TÍTULOS MÁS REPETIDOS:")
+        for i, entrada in enumerate(datos['titulos_mas_repetidos'], 1):
+            print(f"   {i}. '{entrada['titulo'][:80]}' - {entrada['apariciones']} veces en {entrada['archivos']} archivo(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrega en paralelo varias descargas de noticias")
+    parser.add_argument('archivos', nargs='*', help="Archivos JSON/NDJSON (por defecto, todos los del catálogo)")
+    parser.add_argument('--desde', help="Descargas del catálogo con notas desde esta fecha (YYYY-MM-DD)")
+    parser.add_argument('--hasta', help="Descargas del catálogo con notas hasta esta fecha (YYYY-MM-DD)")
+    parser.add_argument('--catalogo', default=ARCHIVO_CATALOGO, help="Catálogo de descargas")
+    parser.add_argument('-p', '--procesos', type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument('-n', '--top', type=int, default=10, help="Elementos a mostrar por ranking")
+    parser.add_argument('--salida', help="Guardar el resumen en este archivo JSON")
+    args = parser.parse_args()
+
+    rutas = args.archivos
+    if not rutas:
+        catalogo = CatalogoDescargas(args.catalogo)
+        rutas = [catalogo.ruta_absoluta(e) for e in catalogo.resolver('todas', args.desde, args.hasta)]
+    if not rutas:
+        print("❌ No hay archivos que agregar")
+        raise SystemExit(1)
+
+    print(f"🧮 Agregando {len(rutas)} archivos con {args.procesos} procesos...")
+    inicio = time.perf_counter()
+    agregado = agregar_archivos(rutas, args.procesos)
+    duracion = time.perf_counter() - inicio
+    datos = resumen(agregado, args.top)
+    mostrar_resumen(datos, args.top)
+    print(f"\n⚡ {agregado['total']} noticias en {duracion:.2f} s "
+          f"({agregado['segundos']:.2f} s sumando los workers, {agregado['total'] / duracion:.0f} noticias/s)")
+
+    if args.salida:
+        serializacion.guardar(args.salida, datos, indentado=True)
+        print(f"📁 Resumen guardado en: {args.salida}")
@@ -0,0 +1,391 @@
+import argparse
+import difflib
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import metricas
+import serializacion
+from exportar_carpetas import exportar_carpetas
+from lectura_notas import LectorNotas
+from planificador_consultas import CAMPO_COINCIDENCIAS
+
+# Una sola base para todas las descargas: así las notas repetidas se saltan y las editadas se versionan
+ARCHIVO_BD = os.environ.get('NOTAS_BD', 'noticias.db')
+TAMANO_LOTE = 1000
+
+# Campos que dependen de la consulta y no del contenido: no cuentan como edición
+CAMPOS_NO_VERSIONADOS = (CAMPO_COINCIDENCIAS,)
+
+# Los textos más cortos se guardan enteros en el delta en lugar de como cambios
+LONGITUD_MINIMA_DIFF = 200
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS notas (
+    id TEXT PRIMARY KEY,
+    titulo TEXT,
+    contenido TEXT,
+    resumen TEXT,
+    fecha TEXT,
+    fuente TEXT,
+    nombre_programa TEXT,
+    nota_json TEXT NOT NULL,
+    fecha_guardado TEXT NOT NULL,
+    hash TEXT,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_notas_fecha ON notas (fecha);
+CREATE INDEX IF NOT EXISTS idx_notas_fuente ON notas (fuente);
+CREATE INDEX IF NOT EXISTS idx_notas_programa ON notas (nombre_programa);
+CREATE TABLE IF NOT EXISTS versiones (
+    id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    fecha_guardado TEXT NOT NULL,
+    delta TEXT NOT NULL,
+    PRIMARY KEY (id, version)
+) WITHOUT ROWID;
+"""
+
+def hash_contenido(nota):
+    """SHA-256 de la nota con las claves ordenadas, sin los campos no versionados"""
+    contenido = {k: v for k, v in nota.items() if k not in CAMPOS_NO_VERSIONADOS}
+    return hashlib.sha256(serializacion.volcar_bytes(contenido, indentado=False, ordenar_claves=True)).hexdigest()
+
+def _diff_texto(nuevo, anterior):
+    """Cambios [inicio, fin, texto] que convierten 'nuevo' en 'anterior' (posiciones en 'nuevo')
+
+    Se compara por palabras (conservando los espacios) para que editar una
+    frase de un contenido largo produzca unos pocos cambios pequeños.
+    """
+    piezas_nuevo = re.findall(r'\s+|\S+', nuevo)
+    piezas_anterior = re.findall(r'\s+|\S+', anterior)
+    posiciones = [0]
+    for pieza in piezas_nuevo:
+        posiciones.append(posiciones[-1] + len(pieza))
+
+    comparador = difflib.SequenceMatcher(None, piezas_nuevo, piezas_anterior, autojunk=False)
+    return [
+        [posiciones[i1], posiciones[i2], ''.join(piezas_anterior[j1:j2])]
+        for operacion, i1, i2, j1, j2 in comparador.get_opcodes()
+        if operacion != 'equal'
+    ]
+
+def _aplicar_texto(texto, cambios):
+    partes = []
+    posicion = 0
+    for inicio, fin, reemplazo in cambios:
+        partes.append(texto[posicion:inicio])
+        partes.append(reemplazo)
+        posicion = fin
+    partes.append(texto[posicion:])
+    return ''.join(partes)
+
+def calcular_delta(nueva, anterior):
+    """Delta que reconstruye 'anterior' a partir de 'nueva'
+
+    {'campos': {campo: valor anterior}, 'textos': {campo: cambios},
+    'borrados': [campos que no existían]}. Los textos largos editados se
+    guardan como cambios por palabras si ocupan menos que el texto entero.
+    Devuelve {} si las notas son iguales.
+    """
+    delta = {}
+    for campo, valor in anterior.items():
+        if campo in nueva and nueva[campo] == valor:
+            continue
+        actual = nueva.get(campo)
+        if isinstance(valor, str) and isinstance(actual, str) and len(valor) >= LONGITUD_MINIMA_DIFF:
+            cambios = _diff_texto(actual, valor)
+            if sum(len(reemplazo) + 8 for _, _, reemplazo in cambios) < len(valor):
+                delta.setdefault('textos', {})[campo] = cambios
+                continue
+        delta.setdefault('campos', {})[campo] = valor
+    borrados = [campo for campo in nueva if campo not in anterior]
+    if borrados:
+        delta['borrados'] = borrados
+    return delta
+
+def aplicar_delta(nota, delta):
+    """Reconstruye la versión anterior de 'nota' con un delta de calcular_delta()"""
+    anterior = {k: v for k, v in nota.items() if k not in delta.get('borrados', ())}
+    for campo, cambios in delta.get('textos', {}).items():
+        anterior[campo] = _aplicar_texto(nota[campo], cambios)
+    anterior.update(delta.get('campos', {}))
+    return anterior
+
+class AlmacenNotas:
+    """Almacén de notas en una única base de datos SQLite
+
+    Sustituye a la carpeta por noticia: todas las notas van a la tabla 'notas'
+    (con la nota original en 'nota_json'), insertadas por lotes en
+    transacciones y con el journal en modo WAL. La estructura de carpetas se
+    puede seguir generando con exportar_carpetas().
+
+    Cada nota guarda el hash de su contenido: al volver a insertar una nota
+    sin cambios no se escribe nada, y si el 'id' ya existe con otro contenido
+    la nota se actualiza y la versión anterior queda en 'versiones' como un
+    delta respecto a la nueva (ver historial()). Así, volver a descargar un
+    rango que se solapa con otro ya guardado casi no ocupa espacio.
+    """
+
+    def __init__(self, ruta=ARCHIVO_BD):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        self.conexion.executescript(ESQUEMA)
+        self._migrar()
+        self.resumen = {'nuevas': 0, 'editadas': 0, 'sin_cambios': 0}
+
+    def _migrar(self):
+        """Añade las columnas de versionado a las bases creadas antes de que existieran"""
+        columnas = {fila[1] for fila in self.conexion.execute('PRAGMA table_info(notas)')}
+        with self.conexion:
+            if 'hash' not in columnas:
+                self.conexion.execute('ALTER TABLE notas ADD COLUMN hash TEXT')
+            if 'version' not in columnas:
+                self.conexion.execute('ALTER TABLE notas ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+    def insertar_notas(self, notas, tamano_lote=TAMANO_LOTE):
+        """Inserta las notas en lotes de tamano_lote por transacción y devuelve cuántas se escribieron
+
+        Las notas cuyo 'id' ya está guardado con el mismo contenido se saltan;
+        las editadas reemplazan a la guardada y suben de versión. Los contadores
+        acumulados quedan en self.resumen ('nuevas', 'editadas', 'sin_cambios').
+        """
+        fecha_guardado = datetime.now().isoformat()
+        lote = []
+        total = 0
+        for nota in notas:
+            lote.append(nota)
+            if len(lote) >= tamano_lote:
+                total += self._insertar_lote(lote, fecha_guardado)
+                lote = []
+        if lote:
+            total += self._insertar_lote(lote, fecha_guardado)
+        return total
+
+    def _guardadas(self, ids):
+        """{id: [hash, versión, fecha_guardado]} de los ids que ya están en la base"""
+        guardadas = {}
+        ids = list(ids)
+        for inicio in range(0, len(ids), 500):
+            parte = ids[inicio:inicio + 500]
+            consulta = (f"SELECT id, hash, version, fecha_guardado, CASE WHEN hash IS NULL THEN nota_json END FROM notas "
+                        f"WHERE id IN ({', '.join('?' * len(parte))})")
+            for nota_id, hash_guardado, version, fecha, nota_json in self.conexion.execute(consulta, parte):
+                # Las filas anteriores al versionado no tienen hash: se calcula al vuelo
+                guardadas[nota_id] = [hash_guardado or hash_contenido(serializacion.cargar_bytes(nota_json)),
+                                      version, fecha]
+        return guardadas
+
+    def _insertar_lote(self, lote, fecha_guardado):
+        registro = metricas.obtener()
+        with registro.etapa('escritura_sqlite'), self.conexion:
+            guardadas = self._guardadas({str(nota['id']) for nota in lote if nota.get('id') is not None})
+            filas = {}
+            sin_id = []
+            versiones = []
+            contadores = {'nuevas': 0, 'editadas': 0, 'sin_cambios': 0}
+            for nota in lote:
+                hash_nota = hash_contenido(nota)
+                nota_id = nota.get('id')
+                clave = str(nota_id) if nota_id is not None else None
+                guardada = guardadas.get(clave) if clave is not None else None
+                version = 1
+                if guardada is not None and guardada[0] == hash_nota:
+                    contadores['sin_cambios'] += 1
+                    continue
+                if guardada is not None:
+                    version = self._guardar_version(clave, guardada, nota, filas, versiones)
+                    if version is None:
+                        # Mismo contenido con otra serialización: solo se actualiza el hash
+                        self.conexion.execute('UPDATE notas SET hash = ? WHERE id = ?', (hash_nota, clave))
+                        contadores['sin_cambios'] += 1
+                        continue
+                    contadores['editadas'] += 1
+                else:
+                    contadores['nuevas'] += 1
+
+                fila = (
+                    clave,
+                    nota.get('titulo', nota.get('title')),
+                    nota.get('contenido', nota.get('content')),
+                    nota.get('resumen', nota.get('summary')),
+                    nota.get('fecha', nota.get('date')),
+                    nota.get('fuente', nota.get('source')),
+                    nota.get('nombre_programa'),
+                    serializacion.volcar(nota, indentado=False),
+                    fecha_guardado,
+                    hash_nota,
+                    version
+                )
+                if clave is None:
+                    sin_id.append(fila)
+                    continue
+                filas[clave] = fila
+                # Si el mismo id se repite en el lote, la siguiente aparición se compara con esta
+                guardadas[clave] = [hash_nota, version, fecha_guardado]
+
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO notas '
+                '(id, titulo, contenido, resumen, fecha, fuente, nombre_programa, nota_json, fecha_guardado, hash, version) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                list(filas.values()) + sin_id
+            )
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO versiones (id, version, hash, fecha_guardado, delta) VALUES (?, ?, ?, ?, ?)',
+                versiones
+            )
+
+        for nombre, valor in contadores.items():
+            self.resumen[nombre] += valor
+            registro.contar(f"almacen_{nombre}", valor)
+        return contadores['nuevas'] + contadores['editadas']
+
+    def _guardar_version(self, clave, guardada, nota, filas, versiones):
+        """Prepara el delta de la versión guardada de 'clave' y devuelve el número de la nueva
+
+        Devuelve None si, pese al hash distinto (guardado con otro backend de
+        JSON), el contenido es el mismo.
+        """
+        hash_anterior, version_anterior, fecha_anterior = guardada
+        if clave in filas:
+            anterior = serializacion.cargar_bytes(filas[clave][7])
+        else:
+            anterior = self.obtener(clave)
+        if hash_contenido(anterior) == hash_contenido(nota):
+            return None
+        delta = calcular_delta(nota, anterior)
+        versiones.append((clave, version_anterior, hash_anterior, fecha_anterior,
+                          serializacion.volcar(delta, indentado=False)))
+        return version_anterior + 1
+
+    def obtener(self, nota_id, version=None):
+        """Nota guardada con ese 'id' (la versión actual, o la indicada) o None"""
+        if version is None:
+            fila = self.conexion.execute('SELECT nota_json FROM notas WHERE id = ?', (str(nota_id),)).fetchone()
+            return serializacion.cargar_bytes(fila[0]) if fila else None
+        for anterior in self.historial(nota_id):
+            if anterior['version'] == version:
+                return anterior['nota']
+        return None
+
+    def historial(self, nota_id):
+        """Versiones de una nota de la más antigua a la actual
+
+        Cada elemento es {'version', 'hash', 'fecha_guardado', 'nota'}; las
+        versiones anteriores se reconstruyen aplicando los deltas hacia atrás
+        desde la actual.
+        """
+        fila = self.conexion.execute(
+            'SELECT nota_json, hash, version, fecha_guardado FROM notas WHERE id = ?', (str(nota_id),)
+        ).fetchone()
+        if fila is None:
+            return []
+        nota_json, hash_actual, version, fecha_guardado = fila
+        nota = serializacion.cargar_bytes(nota_json)
+        versiones = [{'version': version, 'hash': hash_actual or hash_contenido(nota),
+                      'fecha_guardado': fecha_guardado, 'nota': nota}]
+        anteriores = self.conexion.execute(
+            'SELECT version, hash, fecha_guardado, delta FROM versiones WHERE id = ? ORDER BY version DESC',
+            (str(nota_id),)
+        )
+        for version, hash_anterior, fecha_guardado, delta in anteriores:
+            nota = aplicar_delta(nota, serializacion.cargar_bytes(delta))
+            versiones.append({'version': version, 'hash': hash_anterior,
+                              'fecha_guardado': fecha_guardado, 'nota': nota})
+        versiones.reverse()
+        return versiones
+
+    def contar(self):
+        return self.conexion.execute('SELECT COUNT(*) FROM notas').fetchone()[0]
+
+    def iterar_notas(self, fecha_inicio=None, fecha_fin=None, fuente=None, nombre_programa=None):
+        """Recorre las notas guardadas (filtrando opcionalmente) en orden de fecha"""
+        condiciones = []
+        valores = []
+        if fecha_inicio:
+            condiciones.append('fecha >= ?')
+            valores.append(fecha_inicio)
+        if fecha_fin:
+            # Las fechas son ISO: todo lo que empiece por fecha_fin es anterior a fecha_fin + '~'
+            condiciones.append('fecha < ?')
+            valores.append(f"{fecha_fin}~")
+        if fuente:
+            condiciones.append('fuente = ?')
+            valores.append(fuente)
+        if nombre_programa:
+            condiciones.append('nombre_programa = ?')
+            valores.append(nombre_programa)
+
+        consulta = 'SELECT nota_json FROM notas'
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        consulta += ' ORDER BY fecha, rowid'
+        for (nota_json,) in self.conexion.execute(consulta, valores):
+            yield serializacion.cargar_bytes(nota_json)
+
+    def exportar_carpetas(self, main_folder, **filtros):
+        """Genera la estructura de una carpeta por noticia a partir de la base de datos"""
+        return exportar_carpetas(list(self.iterar_notas(**filtros)), main_folder)
+
+    def close(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén SQLite de noticias con historial de versiones")
+    parser.add_argument('--bd', default=ARCHIVO_BD, help=f"Base de datos (default: {ARCHIVO_BD})")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p_importar = subparsers.add_parser('importar', help="Guarda descargas JSON/NDJSON saltando las notas sin cambios")
+    p_importar.add_argument('archivos', nargs='+')
+
+    p_historial = subparsers.add_parser('historial', help="Muestra las versiones guardadas de una nota")
+    p_historial.add_argument('id')
+    p_historial.add_argument('--completo', action='store_true', help="Mostrar cada versión completa")
+    args = parser.parse_args()
+
+    with AlmacenNotas(args.bd) as almacen:
+        if args.comando == 'importar':
+            for archivo in args.archivos:
+                antes = dict(almacen.resumen)
+                almacen.insertar_notas(LectorNotas(archivo))
+                cambios = {k: almacen.resumen[k] - antes[k] for k in almacen.resumen}
+                print(f"🗄️  {archivo}: {cambios['nuevas']} nuevas, {cambios['editadas']} editadas, "
+                      f"{cambios['sin_cambios']} sin cambios")
+            print(f"📊 {almacen.contar()} noticias en {args.bd}")
+        else:
+            versiones = almacen.historial(args.id)
+            if not versiones:
+                print(f"❌ No hay ninguna nota con id {args.id}")
+                raise SystemExit(1)
+            anterior = None
+            for version in versiones:
+                nota = version['nota']
+                print(f"📝 Versión {version['version']} ({version['fecha_guardado'][:19]}, {version['hash'][:12]})")
+                if args.completo:
+                    print(serializacion.volcar(nota, indentado=True))
+                elif anterior is None:
+                    print(f"   {str(nota.get('titulo', 'Sin título'))[:100]}")
+                else:
+                    for campo in sorted(set(anterior) | set(nota)):
+                        antes, despues = anterior.get(campo), nota.get(campo)
+                        if campo in CAMPOS_NO_VERSIONADOS or antes == despues:
+                            continue
+                        if isinstance(antes, str) and isinstance(despues, str):
+                            # Solo los fragmentos que cambiaron, no el texto entero
+                            for inicio, fin, texto in _diff_texto(antes, despues)[:3]:
+                                print(f"   ✏️  {campo}: {antes[inicio:fin][:60]!r} -> {texto[:60]!r}")
+                        else:
+                            print(f"   ✏️  {campo}: {str(antes)[:60]!r} -> {str(despues)[:60]!r}")
+                anterior = nota
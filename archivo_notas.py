@@ -0,0 +1,319 @@
+import argparse
+import gzip
+import os
+from datetime import datetime
+
+import serializacion
+from catalogo_descargas import registrar_descarga
+from escritor_ndjson import EscritorNDJSON
+
+# zstd si está instalado (pip install zstandard); si no, bloques gzip de la librería estándar
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESIONES = ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+# Compresión por defecto (se puede cambiar con NOTAS_ARCHIVO_COMPRESION)
+COMPRESION = os.environ.get('NOTAS_ARCHIVO_COMPRESION', COMPRESIONES[0])
+EXTENSIONES = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+NOTAS_POR_BLOQUE = 500
+VERSION_FORMATO = 1
+
+def ruta_indice(ruta):
+    """Ruta del índice que acompaña a un archivo comprimido"""
+    return f"{ruta}.indice.json"
+
+def es_archivo_comprimido(ruta):
+    return ruta.endswith(tuple(EXTENSIONES.values()))
+
+def comprimir_bloque(datos, compresion):
+    if compresion == 'zstd':
+        return zstandard.ZstdCompressor(level=9).compress(datos)
+    return gzip.compress(datos, compresslevel=6, mtime=0)
+
+def descomprimir_bloque(datos, compresion):
+    if compresion == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return gzip.decompress(datos)
+
+class EscritorArchivo:
+    """Escribe notas en bloques comprimidos de N notas con un índice aparte
+
+    Cada bloque es un miembro gzip (o un frame zstd) independiente con N notas
+    en NDJSON, así que el archivo completo sigue siendo un NDJSON comprimido
+    válido (zcat/zstdcat lo leen entero). El índice (<archivo>.indice.json)
+    guarda la posición, tamaño y rango de fechas de cada bloque y el bloque de
+    cada 'id', para descomprimir solo los bloques necesarios. Mismo uso que
+    EscritorNDJSON: abrir/escribir_notas/cerrar (o abortar) o como context
+    manager. Los bloques se escriben en <ruta>.tmp y solo al cerrar sin errores
+    se escribe el índice y se renombran ambos, el índice primero; el índice
+    guarda el tamaño de los datos, así un archivo a medio publicar no pasa
+    por completo.
+    """
+
+    def __init__(self, ruta, parametros_busqueda=None, notas_por_bloque=NOTAS_POR_BLOQUE, compresion=None):
+        self.ruta = ruta
+        self.parametros_busqueda = parametros_busqueda or {}
+        self.notas_por_bloque = notas_por_bloque
+        self.compresion = compresion or COMPRESION
+        if self.compresion not in COMPRESIONES:
+            raise ValueError(f"Compresión no disponible: {self.compresion} (disponibles: {', '.join(COMPRESIONES)})")
+        self.total = 0
+        self.fecha_min = None
+        self.fecha_max = None
+        self.bloques = []
+        self.ids = {}
+        self.pendientes = []
+        self.archivo = None
+        self.fecha_descarga = None
+
+    @property
+    def ruta_temporal(self):
+        return f"{self.ruta}.tmp"
+
+    def abrir(self):
+        self.archivo = open(self.ruta_temporal, 'wb')
+        self.fecha_descarga = datetime.now().isoformat()
+        return self
+
+    def escribir_notas(self, notas):
+        """Añade notas; cada vez que se juntan N se comprime y escribe un bloque"""
+        for nota in notas:
+            self.pendientes.append(nota)
+            if len(self.pendientes) >= self.notas_por_bloque:
+                self._escribir_bloque()
+
+    def _escribir_bloque(self):
+        notas, self.pendientes = self.pendientes, []
+        numero = len(self.bloques)
+        fechas = [nota['fecha'] for nota in notas if nota.get('fecha')]
+        datos = b''.join(serializacion.volcar_bytes(nota, indentado=False) + b'\n' for nota in notas)
+        comprimido = comprimir_bloque(datos, self.compresion)
+
+        self.bloques.append({
+            'posicion': self.archivo.tell(),
+            'longitud': len(comprimido),
+            'notas': len(notas),
+            'fecha_min': min(fechas) if fechas else None,
+            'fecha_max': max(fechas) if fechas else None
+        })
+        self.archivo.write(comprimido)
+        for nota in notas:
+            if nota.get('id') is not None:
+                self.ids[str(nota['id'])] = numero
+
+        self.total += len(notas)
+        if fechas:
+            if self.fecha_min is None or min(fechas) < self.fecha_min:
+                self.fecha_min = min(fechas)
+            if self.fecha_max is None or max(fechas) > self.fecha_max:
+                self.fecha_max = max(fechas)
+
+    def cerrar(self):
+        if self.archivo is None:
+            return
+        if self.pendientes:
+            self._escribir_bloque()
+        tamano = self.archivo.tell()
+        self.archivo.close()
+        self.archivo = None
+
+        indice = {
+            'formato': VERSION_FORMATO,
+            'compresion': self.compresion,
+            'notas_por_bloque': self.notas_por_bloque,
+            'fecha_descarga': self.fecha_descarga,
+            'parametros_busqueda': self.parametros_busqueda,
+            'total': self.total,
+            'fecha_min': self.fecha_min,
+            'fecha_max': self.fecha_max,
+            'tamano': tamano,
+            'bloques': self.bloques,
+            'ids': self.ids
+        }
+        # Primero el índice y después los datos: si se corta entre los dos renombrados,
+        # LectorArchivo ve que los datos no tienen el 'tamano' del índice y lo rechaza
+        temporal = f"{ruta_indice(self.ruta)}.tmp"
+        serializacion.guardar(temporal, indice, indentado=False)
+        os.replace(temporal, ruta_indice(self.ruta))
+        os.replace(self.ruta_temporal, self.ruta)
+
+    def abortar(self):
+        """Cierra y borra los bloques escritos sin generar el índice (la descarga no terminó)"""
+        if self.archivo is None:
+            return
+        self.archivo.close()
+        self.archivo = None
+        self.pendientes = []
+        # Sin excepciones aquí: se llama mientras se propaga el error de la descarga
+        if os.path.exists(self.ruta_temporal):
+            os.remove(self.ruta_temporal)
+
+    def __enter__(self):
+        return self.abrir()
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+class LectorArchivo:
+    """Lee un archivo comprimido por bloques usando su índice
+
+    Iterarlo recorre todas las notas bloque a bloque; obtener(id) y
+    por_fecha(desde, hasta) solo descomprimen los bloques que pueden contener
+    las notas pedidas. En self.cabecera quedan los metadatos de la descarga.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.indice = serializacion.cargar(ruta_indice(ruta))
+        tamano = self.indice.get('tamano')
+        if tamano is not None and (not os.path.exists(ruta) or os.path.getsize(ruta) != tamano):
+            raise ValueError(f"{ruta} no corresponde a su índice (descarga sin terminar de guardar)")
+        self.compresion = self.indice['compresion']
+        if self.compresion not in COMPRESIONES:
+            raise ValueError(f"El archivo usa {self.compresion} y no está disponible (pip install zstandard)")
+        self.cabecera = {
+            clave: self.indice.get(clave) for clave in ('fecha_descarga', 'parametros_busqueda', 'total')
+        }
+        self.bloques_leidos = 0
+
+    def __len__(self):
+        return self.indice['total']
+
+    def leer_bloque(self, numero, archivo=None):
+        """Descomprime un bloque y devuelve sus notas"""
+        bloque = self.indice['bloques'][numero]
+        if archivo is None:
+            with open(self.ruta, 'rb') as f:
+                return self.leer_bloque(numero, f)
+        archivo.seek(bloque['posicion'])
+        datos = descomprimir_bloque(archivo.read(bloque['longitud']), self.compresion)
+        self.bloques_leidos += 1
+        return [serializacion.cargar_bytes(linea) for linea in datos.splitlines() if linea]
+
+    def _iterar_bloques(self, numeros):
+        with open(self.ruta, 'rb') as f:
+            for numero in numeros:
+                yield from self.leer_bloque(numero, f)
+
+    def __iter__(self):
+        return self._iterar_bloques(range(len(self.indice['bloques'])))
+
+    def obtener(self, nota_id):
+        """Nota con ese 'id', o None si no está en el archivo"""
+        numero = self.indice['ids'].get(str(nota_id))
+        if numero is None:
+            return None
+        for nota in self.leer_bloque(numero):
+            if str(nota.get('id')) == str(nota_id):
+                return nota
+        return None
+
+    def bloques_en_rango(self, desde=None, hasta=None):
+        """Números de los bloques con alguna nota entre desde y hasta (YYYY-MM-DD, inclusive)"""
+        numeros = []
+        for numero, bloque in enumerate(self.indice['bloques']):
+            if bloque['fecha_min'] is None:
+                continue
+            if desde and bloque['fecha_max'][:10] < desde:
+                continue
+            if hasta and bloque['fecha_min'][:10] > hasta:
+                continue
+            numeros.append(numero)
+        return numeros
+
+    def por_fecha(self, desde=None, hasta=None):
+        """Genera las notas con fecha entre desde y hasta (YYYY-MM-DD, inclusive)"""
+        for nota in self._iterar_bloques(self.bloques_en_rango(desde, hasta)):
+            dia = str(nota.get('fecha') or '')[:10]
+            if not dia or (desde and dia < desde) or (hasta and dia > hasta):
+                continue
+            yield nota
+
+def ruta_comprimida(ruta, compresion=None):
+    """Nombre del archivo comprimido para una descarga (todas_las_noticias_X.json -> .ndjson.gz)"""
+    base = ruta
+    for extension in ('.json', '.ndjson', '.jsonl'):
+        if base.endswith(extension):
+            base = base[:-len(extension)]
+            break
+    return base + EXTENSIONES[compresion or COMPRESION]
+
+def comprimir(entrada, salida=None, notas_por_bloque=NOTAS_POR_BLOQUE, compresion=None):
+    """Convierte una descarga JSON/NDJSON en un archivo comprimido por bloques y lo registra en el catálogo"""
+    from lectura_notas import LectorNotas
+
+    salida = salida or ruta_comprimida(entrada, compresion)
+    lector = LectorNotas(entrada)
+    escritor = EscritorArchivo(salida, notas_por_bloque=notas_por_bloque, compresion=compresion)
+    with escritor:
+        for nota in lector:
+            escritor.escribir_notas([nota])
+        escritor.parametros_busqueda = lector.cabecera.get('parametros_busqueda') or {}
+    registrar_descarga(salida, escritor.parametros_busqueda, origen='archivo_notas', total=escritor.total,
+                       fecha_min=escritor.fecha_min, fecha_max=escritor.fecha_max)
+    return salida
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivo comprimido por bloques con índice por id y fecha")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p_comprimir = subparsers.add_parser('comprimir', help="Convierte descargas JSON/NDJSON al formato comprimido")
+    p_comprimir.add_argument('archivos', nargs='+')
+    p_comprimir.add_argument('-n', '--notas-por-bloque', type=int, default=NOTAS_POR_BLOQUE)
+    p_comprimir.add_argument('--compresion', choices=COMPRESIONES, default=COMPRESION)
+
+    p_info = subparsers.add_parser('info', help="Muestra el índice de un archivo comprimido")
+    p_info.add_argument('archivo')
+
+    p_nota = subparsers.add_parser('nota', help="Muestra una nota por su id")
+    p_nota.add_argument('archivo')
+    p_nota.add_argument('id')
+
+    p_extraer = subparsers.add_parser('extraer', help="Extrae las notas de un rango de fechas")
+    p_extraer.add_argument('archivo')
+    p_extraer.add_argument('--desde', help="Desde esta fecha (YYYY-MM-DD)")
+    p_extraer.add_argument('--hasta', help="Hasta esta fecha (YYYY-MM-DD)")
+    p_extraer.add_argument('--salida', help="Guardar las notas en este archivo NDJSON")
+    args = parser.parse_args()
+
+    if args.comando == 'comprimir':
+        for archivo in args.archivos:
+            salida = comprimir(archivo, notas_por_bloque=args.notas_por_bloque, compresion=args.compresion)
+            original = os.path.getsize(archivo)
+            comprimido = os.path.getsize(salida) + os.path.getsize(ruta_indice(salida))
+            print(f"🗜️  {archivo} -> {salida}: {original / 1024:.0f} KB -> {comprimido / 1024:.0f} KB "
+                  f"({original / max(comprimido, 1):.1f}x, índice incluido)")
+    elif args.comando == 'info':
+        lector = LectorArchivo(args.archivo)
+        indice = lector.indice
+        print(f"🗜️  {args.archivo} ({indice['compresion']})")
+        print(f"   Noticias: {indice['total']} en {len(indice['bloques'])} bloques de hasta {indice['notas_por_bloque']}")
+        print(f"   Fechas: {(indice['fecha_min'] or '?')[:10]} a {(indice['fecha_max'] or '?')[:10]}")
+        print(f"   IDs indexados: {len(indice['ids'])}")
+    elif args.comando == 'nota':
+        nota = LectorArchivo(args.archivo).obtener(args.id)
+        if nota is None:
+            print(f"❌ No hay ninguna nota con id {args.id}")
+            raise SystemExit(1)
+        print(serializacion.volcar(nota, indentado=True))
+    else:
+        lector = LectorArchivo(args.archivo)
+        notas = lector.por_fecha(args.desde, args.hasta)
+        if args.salida:
+            with EscritorNDJSON(args.salida, lector.cabecera.get('parametros_busqueda')) as escritor:
+                escritor.escribir_notas(notas)
+            total = escritor.total
+            registrar_descarga(args.salida, escritor.parametros_busqueda, origen='archivo_notas', total=total,
+                               fecha_min=escritor.fecha_min, fecha_max=escritor.fecha_max)
+        else:
+            total = sum(1 for _ in notas)
+        print(f"📅 {total} noticias entre {args.desde or 'el inicio'} y {args.hasta or 'el final'} "
+              f"({lector.bloques_leidos}/{len(lector.indice['bloques'])} bloques descomprimidos)")
+        if args.salida:
+            print(f"📁 Guardadas en: {args.salida}")
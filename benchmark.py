@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import io
+import os
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import serializacion
+from almacen_sqlite import AlmacenNotas
+from cliente_notas import ClienteNotas
+from contar_noticias import analizar_en_streaming, contar_noticias_archivo
+from descargar_noticias_paginadas import BASE_PARAMS, descargar_ndjson, obtener_noticias
+from exportar_carpetas import exportar_carpetas
+from metricas import percentil
+
+def medir(funcion, repeticiones=1, verbose=False):
+    """Ejecuta funcion() 'repeticiones' veces cronometrada y una más con tracemalloc
+
+    Devuelve (resultado, mediana de segundos, pico de memoria en bytes). El pico
+    se mide en una ejecución aparte porque tracemalloc ralentiza el código.
+    """
+    salida = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    tiempos = []
+    with salida:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return resultado, statistics.median(tiempos), pico
+
+class ServidorEnProceso:
+    """Ejecuta servidor_mock.py en otro proceso para que no compita por el GIL con el cliente medido"""
+
+    def __init__(self, total_notas, latencia, jitter, tasa_errores):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.puerto = s.getsockname()[1]
+        self.argumentos = [
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servidor_mock.py'),
+            '--puerto', str(self.puerto), '--notas', str(total_notas), '--latencia', str(latencia),
+            '--jitter', str(jitter), '--errores', str(tasa_errores)
+        ]
+        self.proceso = None
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self.puerto}/notas-api"
+
+    def __enter__(self):
+        self.proceso = subprocess.Popen(self.argumentos, stdout=subprocess.DEVNULL)
+        limite = time.monotonic() + 60
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', self.puerto), timeout=1).close()
+                return self
+            except OSError:
+                if self.proceso.poll() is not None or time.monotonic() > limite:
+                    self.proceso.kill()
+                    raise RuntimeError("No se pudo iniciar el servidor mock")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc):
+        self.proceso.terminate()
+        self.proceso.wait()
+
+class RegistroLatencias:
+    """Guarda el tiempo hasta la respuesta de cada petición de un ClienteNotas"""
+
+    def __init__(self, cliente):
+        self.latencias = []
+        cliente.session.hooks['response'].append(self._registrar)
+
+    def _registrar(self, response, *args, **kwargs):
+        self.latencias.append(response.elapsed.total_seconds())
+
+    def reiniciar(self):
+        self.latencias.clear()
+
+def resultado_etapa(nombre, notas, segundos, pico, latencias=None):
+    resultado = {
+        'etapa': nombre,
+        'notas': notas,
+        'segundos': round(segundos, 4),
+        'notas_por_segundo': round(notas / segundos, 1) if segundos > 0 else None,
+        'pico_memoria_mb': round(pico / 1024 / 1024, 2)
+    }
+    if latencias:
+        resultado['peticiones'] = len(latencias)
+        resultado['latencia_p50_ms'] = round(percentil(latencias, 50) * 1000, 1)
+        resultado['latencia_p99_ms'] = round(percentil(latencias, 99) * 1000, 1)
+    return resultado
+
+def ejecutar_benchmark(total_notas=10000, latencia=0.02, jitter=0.01, tasa_errores=0.0, max_workers=4,
+                       repeticiones=1, verbose=False):
+    """Levanta un servidor mock y mide descarga, exportación y análisis; devuelve el informe"""
+    directorio = tempfile.mkdtemp(prefix='benchmark_noticias_')
+    etapas = []
+    directorio_original = os.getcwd()
+
+    with ServidorEnProceso(total_notas, latencia, jitter, tasa_errores) as servidor:
+        cliente = ClienteNotas(url_base=servidor.url_base, pool_size=max(max_workers, 1))
+        registro = RegistroLatencias(cliente)
+        try:
+            os.chdir(directorio)
+            base_params = dict(BASE_PARAMS)
+
+            # 1. Descarga paginada a memoria + JSON, como descargar_noticias_paginadas.py
+            ruta_json = os.path.join(directorio, 'noticias.json')
+
+            def descarga_json():
+                registro.reiniciar()
+                notas = obtener_noticias(cliente, base_params, max_workers)
+                serializacion.guardar(ruta_json, {'total': len(notas), 'fecha_descarga': datetime.now().isoformat(),
+                                                  'parametros_busqueda': base_params, 'noticias': notas})
+                return notas
+
+            print("📥 Descarga JSON...")
+            notas, segundos, pico = medir(descarga_json, repeticiones, verbose)
+            etapas.append(resultado_etapa('descarga_json', len(notas), segundos, pico, list(registro.latencias)))
+            peticiones = len(registro.latencias)
+
+            # 2. Descarga en streaming a NDJSON
+            def descarga_ndjson():
+                registro.reiniciar()
+                return descargar_ndjson(cliente, base_params, max_workers)
+
+            print("📥 Descarga NDJSON...")
+            ruta_ndjson, segundos, pico = medir(descarga_ndjson, repeticiones, verbose)
+            etapas.append(resultado_etapa('descarga_ndjson', len(notas), segundos, pico, list(registro.latencias)))
+            peticiones += len(registro.latencias)
+
+            # 3. Exportación a carpetas y a SQLite
+            carpetas = os.path.join(directorio, 'carpetas')
+
+            def exportacion_carpetas():
+                shutil.rmtree(carpetas, ignore_errors=True)
+                exportar_carpetas(notas, carpetas)
+
+            def exportacion_sqlite():
+                ruta_bd = os.path.join(directorio, 'noticias.db')
+                for sufijo in ('', '-wal', '-shm'):
+                    if os.path.exists(ruta_bd + sufijo):
+                        os.remove(ruta_bd + sufijo)
+                with AlmacenNotas(ruta_bd) as almacen:
+                    almacen.insertar_notas(notas)
+
+            print("💾 Exportación...")
+            _, segundos, pico = medir(exportacion_carpetas, repeticiones, verbose)
+            etapas.append(resultado_etapa('exportar_carpetas', len(notas), segundos, pico))
+            _, segundos, pico = medir(exportacion_sqlite, repeticiones, verbose)
+            etapas.append(resultado_etapa('exportar_sqlite', len(notas), segundos, pico))
+
+            # 4. Análisis de contar_noticias (el análisis en memoria lee el formato de respuesta de la API)
+            print("🔍 Análisis...")
+            ruta_documento = os.path.join(directorio, 'documento_completo.json')
+            serializacion.guardar(ruta_documento, {'success': True, 'total': len(notas), 'notas': notas})
+            _, segundos, pico = medir(lambda: contar_noticias_archivo(ruta_documento), repeticiones, verbose)
+            etapas.append(resultado_etapa('analisis_memoria', len(notas), segundos, pico))
+            _, segundos, pico = medir(lambda: analizar_en_streaming(ruta_ndjson), repeticiones, verbose)
+            etapas.append(resultado_etapa('analisis_streaming', len(notas), segundos, pico))
+        finally:
+            os.chdir(directorio_original)
+            cliente.close()
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    return {
+        'fecha': datetime.now().isoformat(),
+        'configuracion': {
+            'backend_json': serializacion.BACKEND,
+            'total_notas': total_notas,
+            'latencia': latencia,
+            'jitter': jitter,
+            'tasa_errores': tasa_errores,
+            'max_workers': max_workers,
+            'repeticiones': repeticiones
+        },
+        'peticiones_ultima_ronda': peticiones,
+        'pico_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'etapas': etapas
+    }
+
+def mostrar_informe(informe, referencia=None):
+    """Imprime el informe como tabla; con 'referencia' añade la variación de notas/s"""
+    anteriores = {e['etapa']: e for e in (referencia or {}).get('etapas', [])}
+    print(f"\n📊 RESULTADOS ({informe['configuracion']['total_notas']} notas, "
+          f"{informe['configuracion']['max_workers']} workers, JSON: {informe['configuracion']['backend_json']})")
+    print(f"   {'Etapa':<20} {'Notas/s':>10} {'Segundos':>9} {'Pico MB':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for etapa in informe['etapas']:
+        p50 = etapa.get('latencia_p50_ms')
+        p99 = etapa.get('latencia_p99_ms')
+        linea = (f"   {etapa['etapa']:<20} {etapa['notas_por_segundo'] or 0:>10.0f} {etapa['segundos']:>9.3f} "
+                 f"{etapa['pico_memoria_mb']:>8.1f} {'' if p50 is None else p50:>8} {'' if p99 is None else p99:>8}")
+        anterior = anteriores.get(etapa['etapa'])
+        if anterior and anterior.get('notas_por_segundo') and etapa['notas_por_segundo']:
+            cambio = (etapa['notas_por_segundo'] / anterior['notas_por_segundo'] - 1) * 100
+            linea += f"  {'⬆️' if cambio >= 0 else '⬇️'} {cambio:+.1f}%"
+        print(linea)
+    print(f"   Peticiones HTTP (última ronda de descargas, con reintentos): {informe['peticiones_ultima_ronda']}")
+    print(f"   Pico RSS del proceso: {informe['pico_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de descarga, exportación y análisis contra un servidor mock")
+    parser.add_argument('--notas', type=int, default=10000, help="Notas sintéticas en el servidor")
+    parser.add_argument('--latencia', type=float, default=0.02, help="Latencia media por petición (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Variación máxima de la latencia (s)")
+    parser.add_argument('--errores', type=float, default=0.0, help="Proporción de peticiones que fallan")
+    parser.add_argument('--workers', type=int, default=4, help="Descargas simultáneas")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Ejecuciones cronometradas por etapa (mediana)")
+    parser.add_argument('--salida', help="Guardar el informe en este archivo JSON")
+    parser.add_argument('--comparar', help="Informe JSON anterior con el que comparar notas/s")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Mostrar la salida de cada etapa")
+    args = parser.parse_args()
+
+    print("⏱️  Benchmark de noticias contra servidor mock")
+    print("=" * 70)
+    informe = ejecutar_benchmark(args.notas, args.latencia, args.jitter, args.errores, args.workers,
+                                 args.repeticiones, args.verbose)
+
+    referencia = None
+    if args.comparar:
+        referencia = serializacion.cargar(args.comparar)
+    mostrar_informe(informe, referencia)
+
+    if args.salida:
+        serializacion.guardar(args.salida, informe, indentado=True)
+        print(f"\n📁 Informe guardado en: {args.salida}")
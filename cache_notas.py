@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+
+DIRECTORIO_CACHE = '.cache_notas'
+TAMANO_MAXIMO = 512 * 1024 * 1024  # 512 MB
+TTL_RECIENTE = 15 * 60  # segundos
+
+class CacheRespuestas:
+    """Caché en disco de respuestas de /notas indexada por los parámetros de la consulta
+
+    - Si 'fechaFin' es anterior a hoy el día ya está cerrado y la respuesta no caduca.
+    - Si la consulta incluye hoy (o no tiene 'fechaFin') caduca a los ttl_reciente segundos.
+    - Cuando el directorio supera tamano_maximo se eliminan las entradas usadas hace más
+      tiempo (LRU, usando la fecha de acceso de cada archivo).
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, tamano_maximo=TAMANO_MAXIMO, ttl_reciente=TTL_RECIENTE):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.ttl_reciente = ttl_reciente
+        self.lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self.tamano_actual = sum(
+            entrada.stat().st_size for entrada in os.scandir(directorio) if entrada.name.endswith('.json')
+        )
+
+    def clave(self, url, params):
+        """Clave estable para (url, parámetros), independiente del orden de los parámetros"""
+        normalizados = json.dumps([url, sorted((k, str(v)) for k, v in params.items())], ensure_ascii=False)
+        return hashlib.sha256(normalizados.encode('utf-8')).hexdigest()
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def es_permanente(self, params):
+        """Las consultas cuyo rango termina antes de hoy no cambian"""
+        fecha_fin = params.get('fechaFin')
+        return bool(fecha_fin) and str(fecha_fin) < date.today().isoformat()
+
+    def obtener(self, url, params):
+        """Devuelve los bytes de la respuesta guardada o None si no hay entrada válida"""
+        ruta = self.ruta(self.clave(url, params))
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+
+        ahora = time.time()
+        if not self.es_permanente(params) and ahora - estado.st_mtime > self.ttl_reciente:
+            return None
+
+        try:
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+            # Actualizar solo la fecha de acceso (la de modificación marca la antigüedad)
+            os.utime(ruta, (ahora, estado.st_mtime))
+        except FileNotFoundError:
+            return None
+        return contenido
+
+    def guardar(self, url, params, contenido):
+        """Guarda los bytes de la respuesta y aplica el límite de tamaño"""
+        ruta = self.ruta(self.clave(url, params))
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(contenido)
+
+        with self.lock:
+            try:
+                self.tamano_actual -= os.path.getsize(ruta)
+            except FileNotFoundError:
+                pass
+            os.replace(temporal, ruta)
+            self.tamano_actual += len(contenido)
+            if self.tamano_actual > self.tamano_maximo:
+                self._desalojar()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas recientemente hasta quedar bajo el 90% del máximo"""
+        entradas = sorted(
+            (entrada for entrada in os.scandir(self.directorio) if entrada.name.endswith('.json')),
+            key=lambda entrada: entrada.stat().st_atime
+        )
+        objetivo = self.tamano_maximo * 0.9
+        for entrada in entradas:
+            if self.tamano_actual <= objetivo:
+                break
+            try:
+                tamano = entrada.stat().st_size
+                os.remove(entrada.path)
+                self.tamano_actual -= tamano
+            except FileNotFoundError:
+                pass
+
+    def limpiar(self):
+        """Borra todas las entradas de la caché"""
+        with self.lock:
+            for entrada in os.scandir(self.directorio):
+                if entrada.name.endswith('.json'):
+                    os.remove(entrada.path)
+            self.tamano_actual = 0
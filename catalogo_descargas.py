@@ -0,0 +1,154 @@
+import argparse
+import hashlib
+import os
+from datetime import datetime
+
+import serializacion
+from lectura_notas import LectorNotas
+
+# Catálogo de descargas (se puede cambiar con NOTAS_CATALOGO)
+ARCHIVO_CATALOGO = os.environ.get('NOTAS_CATALOGO', 'catalogo_descargas.json')
+TAMANO_BLOQUE = 1024 * 1024
+
+def suma_sha256(ruta):
+    """SHA-256 del archivo leído por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def rango_fechas(notas):
+    """Devuelve (total, fecha mínima, fecha máxima) de las notas (fechas ISO como texto)"""
+    total = 0
+    fecha_min = fecha_max = None
+    for nota in notas:
+        total += 1
+        fecha = nota.get('fecha')
+        if not fecha:
+            continue
+        if fecha_min is None or fecha < fecha_min:
+            fecha_min = fecha
+        if fecha_max is None or fecha > fecha_max:
+            fecha_max = fecha
+    return total, fecha_min, fecha_max
+
+class CatalogoDescargas:
+    """Registro de los archivos descargados: ruta, parámetros, total, rango de fechas y checksum
+
+    Los scripts de descarga añaden una entrada por archivo generado (o la
+    actualizan si la ruta ya estaba, como en la sincronización incremental) y
+    contar_noticias.py resuelve sus entradas a través del catálogo en lugar de
+    recorrer el árbol de directorios. Las rutas se guardan relativas a la
+    carpeta del catálogo, y el archivo se reescribe de forma atómica.
+    """
+
+    def __init__(self, ruta=ARCHIVO_CATALOGO):
+        self.ruta = ruta
+        self.base = os.path.dirname(os.path.abspath(ruta))
+
+    def cargar(self):
+        if not os.path.exists(self.ruta):
+            return []
+        return serializacion.cargar(self.ruta).get('descargas', [])
+
+    def guardar(self, entradas):
+        temporal = f"{self.ruta}.tmp"
+        serializacion.guardar(temporal, {'descargas': entradas}, indentado=True)
+        os.replace(temporal, self.ruta)
+
+    def ruta_absoluta(self, entrada):
+        return os.path.normpath(os.path.join(self.base, entrada['ruta']))
+
+    def registrar(self, ruta, parametros_busqueda=None, notas=None, total=None, fecha_min=None, fecha_max=None,
+                  origen=None):
+        """Añade (o actualiza) la entrada de un archivo descargado
+
+        Con 'notas' se calculan total y rango de fechas a partir de ellas; si no
+        se indican ni notas ni total, se recorre el archivo en streaming.
+        """
+        if notas is not None:
+            total, fecha_min, fecha_max = rango_fechas(notas)
+        elif total is None:
+            total, fecha_min, fecha_max = rango_fechas(LectorNotas(ruta))
+
+        entrada = {
+            'ruta': os.path.relpath(os.path.abspath(ruta), self.base),
+            'origen': origen,
+            'fecha_descarga': datetime.now().isoformat(),
+            'parametros_busqueda': parametros_busqueda or {},
+            'total': total,
+            'fecha_min': fecha_min,
+            'fecha_max': fecha_max,
+            'tamano': os.path.getsize(ruta),
+            'sha256': suma_sha256(ruta)
+        }
+        entradas = [e for e in self.cargar() if e['ruta'] != entrada['ruta']]
+        entradas.append(entrada)
+        self.guardar(entradas)
+        return entrada
+
+    def resolver(self, modo='ultima', desde=None, hasta=None):
+        """Devuelve las entradas a analizar, de la más antigua a la más reciente
+
+        modo='ultima' devuelve solo la descarga más reciente y modo='todas' todas;
+        desde/hasta (YYYY-MM-DD) se quedan con las que tienen notas en ese rango.
+        Las entradas cuyo archivo ya no existe se omiten con un aviso.
+        """
+        entradas = []
+        for entrada in sorted(self.cargar(), key=lambda e: e['fecha_descarga']):
+            if not os.path.exists(self.ruta_absoluta(entrada)):
+                print(f"   ⚠️  En el catálogo pero no en disco: {entrada['ruta']}")
+                continue
+            if desde and (entrada.get('fecha_max') or '')[:10] < desde:
+                continue
+            if hasta and entrada.get('fecha_min') and entrada['fecha_min'][:10] > hasta:
+                continue
+            entradas.append(entrada)
+        if modo == 'ultima':
+            return entradas[-1:]
+        return entradas
+
+    def verificar(self, entrada):
+        """True si el archivo conserva el checksum registrado"""
+        return suma_sha256(self.ruta_absoluta(entrada)) == entrada['sha256']
+
+def registrar_descarga(ruta, parametros_busqueda=None, notas=None, origen=None, **resumen):
+    """Atajo para registrar un archivo en el catálogo por defecto"""
+    entrada = CatalogoDescargas().registrar(ruta, parametros_busqueda, notas, origen=origen, **resumen)
+    print(f"   🗂️  Registrado en el catálogo: {entrada['ruta']} ({entrada['total']} noticias)")
+    return entrada
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catálogo de archivos de noticias descargados")
+    parser.add_argument('--catalogo', default=ARCHIVO_CATALOGO, help="Archivo del catálogo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p_registrar = subparsers.add_parser('registrar', help="Añade archivos ya descargados al catálogo")
+    p_registrar.add_argument('archivos', nargs='+')
+
+    p_listar = subparsers.add_parser('listar', help="Muestra las descargas registradas")
+    p_listar.add_argument('--ultima', action='store_true', help="Solo la más reciente")
+    p_listar.add_argument('--desde', help="Con notas desde esta fecha (YYYY-MM-DD)")
+    p_listar.add_argument('--hasta', help="Con notas hasta esta fecha (YYYY-MM-DD)")
+
+    subparsers.add_parser('verificar', help="Comprueba los checksums de los archivos registrados")
+    args = parser.parse_args()
+
+    catalogo = CatalogoDescargas(args.catalogo)
+    if args.comando == 'registrar':
+        for archivo in args.archivos:
+            entrada = catalogo.registrar(archivo, origen='registro_manual')
+            print(f"🗂️  {entrada['ruta']}: {entrada['total']} noticias")
+    elif args.comando == 'listar':
+        entradas = catalogo.resolver('ultima' if args.ultima else 'todas', args.desde, args.hasta)
+        print(f"🗂️  {len(entradas)} descargas")
+        for entrada in entradas:
+            print(f"   • {entrada['ruta']} - {entrada['total']} noticias - "
+                  f"{(entrada.get('fecha_min') or '?')[:10]} a {(entrada.get('fecha_max') or '?')[:10]} - "
+                  f"descargado {entrada['fecha_descarga'][:19]}")
+    else:
+        for entrada in catalogo.resolver('todas'):
+            estado = '✅' if catalogo.verificar(entrada) else '❌ checksum distinto'
+            print(f"   {estado} {entrada['ruta']}")
@@ -0,0 +1,261 @@
+import hashlib
+import os
+import random
+import socket
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import metricas
+import serializacion
+from cache_notas import CacheRespuestas
+
+# Configuración de la API (se puede sobrescribir con variables de entorno)
+URL_BASE = os.environ.get('NOTAS_API_URL', 'https://evat.oblek.com.mx/notas-api')
+TOKEN = os.environ.get('NOTAS_API_TOKEN', 'xdrqzCwqUd4kMc/5Q5pJtKL6KGPq73dW')
+# Si se define, las respuestas se cachean en disco en este directorio
+DIRECTORIO_CACHE = os.environ.get('NOTAS_CACHE_DIR')
+
+# Timeouts por defecto: (conexión, lectura) en segundos
+TIMEOUT = (5, 60)
+POOL_SIZE = 10
+
+# Reintentos ante errores transitorios
+REINTENTOS = 5
+BACKOFF_BASE = 0.5  # segundos
+BACKOFF_MAXIMO = 30
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+def accept_encoding():
+    """Devuelve las codificaciones que podemos descomprimir (br solo si hay soporte para brotli)"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+def segundos_retry_after(valor):
+    """Interpreta la cabecera Retry-After (segundos o fecha HTTP); None si no es válida"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+class ConexionMedida:
+    """Mezcla para las conexiones de urllib3 que registra DNS, conexión TCP y handshake TLS
+
+    La resolución DNS se cronometra aparte antes de abrir el socket, así que el
+    tiempo de conexión incluye una segunda resolución (normalmente ya en caché).
+    """
+
+    def _new_conn(self):
+        registro = metricas.obtener()
+        inicio = time.perf_counter()
+        socket.getaddrinfo(self._dns_host, self.port, type=socket.SOCK_STREAM)
+        resuelto = time.perf_counter()
+        sock = super()._new_conn()
+        fin = time.perf_counter()
+        registro.observar('http_dns_segundos', resuelto - inicio)
+        registro.observar('http_conexion_segundos', fin - resuelto)
+        self._segundos_socket = fin - inicio
+        return sock
+
+    def connect(self):
+        inicio = time.perf_counter()
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            segundos_tls = time.perf_counter() - inicio - getattr(self, '_segundos_socket', 0.0)
+            metricas.obtener().observar('http_tls_segundos', segundos_tls)
+        metricas.obtener().contar('http_conexiones_nuevas')
+
+class ConexionHTTPMedida(ConexionMedida, HTTPConnection):
+    pass
+
+class ConexionHTTPSMedida(ConexionMedida, HTTPSConnection):
+    pass
+
+class PoolHTTPMedido(HTTPConnectionPool):
+    ConnectionCls = ConexionHTTPMedida
+
+class PoolHTTPSMedido(HTTPSConnectionPool):
+    ConnectionCls = ConexionHTTPSMedida
+
+class AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter cuyas conexiones registran sus tiempos en metricas.obtener()"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': PoolHTTPMedido, 'https': PoolHTTPSMedido}
+
+class ClienteNotas:
+    """Cliente compartido para /notas con una sesión HTTP reutilizable
+
+    La sesión mantiene las conexiones abiertas (keep-alive) en un pool, de modo
+    que las páginas sucesivas no repiten el handshake TCP+TLS, y pide las
+    respuestas comprimidas. Con 'cache' (o NOTAS_CACHE_DIR) las respuestas de
+    obtener_datos() se guardan en disco (ver cache_notas.py).
+
+    obtener_datos() reintenta los 429/5xx y los errores de conexión con espera
+    exponencial con jitter (respetando Retry-After), y con 'control' (un
+    ControlAIMD) limita y adapta las peticiones simultáneas.
+    """
+
+    def __init__(self, url_base=URL_BASE, token=TOKEN, timeout=TIMEOUT, pool_size=POOL_SIZE, cache=None,
+                 reintentos=REINTENTOS, control=None):
+        self.url = f"{url_base.rstrip('/')}/notas"
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.control = control
+        if cache is None and DIRECTORIO_CACHE:
+            cache = CacheRespuestas(DIRECTORIO_CACHE)
+        self.cache = cache
+
+        self.session = requests.Session()
+        # Solo se instrumentan las conexiones si las métricas están activas
+        clase_adapter = AdaptadorMedido if metricas.obtener().activo else HTTPAdapter
+        adapter = clase_adapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'accept': '*/*',
+            'Accept-Encoding': accept_encoding(),
+            'Connection': 'keep-alive',
+            'Authorization': f'Bearer {token}'
+        })
+
+    @property
+    def headers(self):
+        return dict(self.session.headers)
+
+    def get(self, params, headers=None):
+        """Hace la petición GET a /notas y devuelve la respuesta sin validar
+
+        Con las métricas activas registra el tiempo hasta las cabeceras (TTFB),
+        el de lectura del cuerpo y los bytes recibidos (comprimidos y JSON).
+        """
+        registro = metricas.obtener()
+        if not registro.activo:
+            return self.session.get(self.url, params=params, headers=headers, timeout=self.timeout)
+
+        response = self.session.get(self.url, params=params, headers=headers, timeout=self.timeout, stream=True)
+        inicio = time.perf_counter()
+        contenido = response.content
+        registro.observar('http_ttfb_segundos', response.elapsed.total_seconds())
+        registro.observar('http_cuerpo_segundos', time.perf_counter() - inicio)
+        registro.observar('http_bytes_red', response.raw.tell())
+        registro.observar('http_bytes_json', len(contenido))
+        registro.contar('http_peticiones')
+        return response
+
+    def obtener_datos(self, params, usar_cache=True):
+        """Hace la petición, valida el estado HTTP y devuelve el JSON decodificado
+
+        Con usar_cache=False se ignora la entrada guardada (aunque se actualiza con la respuesta nueva).
+        """
+        if self.cache is not None and usar_cache:
+            contenido = self.cache.obtener(self.url, params)
+            if contenido is not None:
+                metricas.obtener().contar('cache_aciertos')
+                with metricas.obtener().etapa('decodificar_json'):
+                    return serializacion.cargar_bytes(contenido)
+
+        response = self.get_con_reintentos(params)
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.guardar(self.url, params, response.content)
+        # Decodificar directamente los bytes: evita pasar por response.text y su detección de charset
+        with metricas.obtener().etapa('decodificar_json'):
+            return serializacion.cargar_bytes(response.content)
+
+    def obtener_si_cambio(self, params, validadores=None):
+        """Petición condicional: devuelve (datos, validadores), con datos=None si no cambió
+
+        'validadores' son los de la respuesta anterior ({'etag', 'last_modified',
+        'sha256'}). Se envían If-None-Match / If-Modified-Since cuando el servidor
+        dio ETag / Last-Modified; un 304, o un cuerpo con el mismo SHA-256 si el
+        servidor no los da, cuentan como sin cambios. No usa la caché.
+        """
+        validadores = validadores or {}
+        cabeceras = {}
+        if validadores.get('etag'):
+            cabeceras['If-None-Match'] = validadores['etag']
+        if validadores.get('last_modified'):
+            cabeceras['If-Modified-Since'] = validadores['last_modified']
+
+        response = self.get_con_reintentos(params, cabeceras)
+        if response.status_code == 304:
+            metricas.obtener().contar('respuestas_sin_cambios')
+            return None, validadores
+        response.raise_for_status()
+        nuevos = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': hashlib.sha256(response.content).hexdigest()
+        }
+        if nuevos['sha256'] == validadores.get('sha256'):
+            metricas.obtener().contar('respuestas_sin_cambios')
+            return None, nuevos
+        with metricas.obtener().etapa('decodificar_json'):
+            return serializacion.cargar_bytes(response.content), nuevos
+
+    def get_con_reintentos(self, params, headers=None):
+        """GET con reintentos ante errores transitorios; devuelve la última respuesta"""
+        for intento in range(self.reintentos + 1):
+            response = None
+            exito = False
+            if self.control is not None:
+                self.control.adquirir()
+            # Se mide desde que hay hueco: la espera en la cola no es latencia del servidor
+            inicio = time.monotonic()
+            try:
+                response = self.get(params, headers)
+                exito = response.status_code not in ESTADOS_REINTENTABLES
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if intento == self.reintentos:
+                    raise
+                motivo = type(e).__name__
+            finally:
+                if self.control is not None:
+                    self.control.liberar(exito, time.monotonic() - inicio)
+
+            if exito or intento == self.reintentos:
+                return response
+
+            espera = None
+            if response is not None:
+                motivo = f"HTTP {response.status_code}"
+                espera = segundos_retry_after(response.headers.get('Retry-After'))
+                response.close()
+            # Espera exponencial con jitter completo, salvo que el servidor indique Retry-After
+            if espera is None:
+                espera = random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** intento))
+            metricas.obtener().contar('reintentos')
+            print(f"   ⏳ {motivo} en página {params.get('page', 1)}, "
+                  f"reintento {intento + 1}/{self.reintentos} en {espera:.1f} s")
+            time.sleep(espera)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
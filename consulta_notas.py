@@ -0,0 +1,126 @@
+import asyncio
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+LIMIT = 500  # Máximo permitido por la API
+POR_DELANTE = 2  # Páginas pedidas por delante por cada worker
+
+def pedir_pagina(cliente, base_params, page, limit=LIMIT):
+    """Pide una página y devuelve (notas, total reportado por la API)"""
+    data = cliente.obtener_datos({**base_params, 'limit': limit, 'page': page})
+    if isinstance(data, list):
+        return data, len(data)
+    if not (isinstance(data, dict) and 'notas' in data):
+        raise ValueError(f"Estructura inesperada en la página {page}")
+    return data['notas'], data.get('total', len(data['notas']))
+
+def descargar_pagina(cliente, base_params, page, limit=LIMIT, diario=None, total_esperado=None):
+    """Descarga una página concreta y devuelve su lista de notas
+
+    Con 'diario' la página se lee de él si ya se descargó con el mismo total y,
+    si no, se descarga y se registra.
+    """
+    pieza = f"pagina:{page}"
+    if diario is not None:
+        notas = diario.obtener(pieza, total_esperado)
+        if notas is not None:
+            return notas
+
+    notas, total = pedir_pagina(cliente, base_params, page, limit)
+    if diario is not None:
+        diario.registrar(pieza, notas, total)
+    return notas
+
+class ConsultaNotas:
+    """Itera las notas de una consulta a la API a medida que llegan las páginas
+
+    La primera página fija el 'total' y el número de páginas; el resto se
+    descargan en segundo plano con max_workers hilos, con como mucho
+    POR_DELANTE * max_workers páginas pedidas por delante de la que se está
+    consumiendo, así que la red trabaja mientras se procesa la página actual y
+    la memoria no crece con el tamaño del resultado. Las páginas se entregan en
+    orden. Iterarla devuelve notas; paginas() devuelve (página, notas), y con
+    'async for' se recorre desde asyncio sin bloquear el bucle de eventos.
+
+        for nota in ConsultaNotas(cliente, fecha_inicio='2025-10-01', fecha_fin='2025-10-22',
+                                  palabras='aduanas, ley'):
+            ...
+    """
+
+    def __init__(self, cliente, base_params=None, fecha_inicio=None, fecha_fin=None, palabras=None,
+                 max_workers=4, limit=LIMIT, diario=None):
+        self.cliente = cliente
+        self.params = {k: v for k, v in (base_params or {}).items() if k not in ('limit', 'page')}
+        if fecha_inicio:
+            self.params['fechaInicio'] = fecha_inicio
+        if fecha_fin:
+            self.params['fechaFin'] = fecha_fin
+        if palabras:
+            self.params['palabras'] = palabras if isinstance(palabras, str) else ', '.join(palabras)
+        self.max_workers = max(max_workers, 1)
+        self.limit = limit
+        self.diario = diario
+        self.total = None
+        self.total_paginas = None
+
+    def paginas(self):
+        """Genera (página, notas) en orden de página"""
+        # La primera página siempre se pide a la API: su 'total' valida las páginas del diario
+        notas, self.total = pedir_pagina(self.cliente, self.params, 1, self.limit)
+        self.total_paginas = max(math.ceil(self.total / self.limit), 1)
+        if self.diario is not None:
+            self.diario.registrar('pagina:1', notas, self.total)
+        yield 1, notas
+        if self.total_paginas == 1 or len(notas) >= self.total:
+            return
+
+        paginas = iter(range(2, self.total_paginas + 1))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def pedir(page):
+                return page, executor.submit(
+                    descargar_pagina, self.cliente, self.params, page, self.limit, self.diario, self.total
+                )
+
+            pendientes = deque(pedir(page) for page in islice(paginas, POR_DELANTE * self.max_workers))
+            try:
+                while pendientes:
+                    page, futuro = pendientes.popleft()
+                    notas = futuro.result()
+
+                    siguiente = next(paginas, None)
+                    if siguiente is not None:
+                        pendientes.append(pedir(siguiente))
+                    yield page, notas
+            finally:
+                # Si se deja de iterar a medias, no se piden las páginas que aún no empezaron
+                for _, futuro in pendientes:
+                    futuro.cancel()
+
+    def __iter__(self):
+        for _, notas in self.paginas():
+            yield from notas
+
+    async def __aiter__(self):
+        # Cada página se espera en un hilo; la descarga de las siguientes sigue en segundo plano
+        paginas = self.paginas()
+        pendiente = None
+        try:
+            while True:
+                # shield: si se cancela la espera, el hilo sigue dentro de next() y hay que dejarle acabar
+                pendiente = asyncio.ensure_future(asyncio.to_thread(next, paginas, None))
+                pagina = await asyncio.shield(pendiente)
+                if pagina is None:
+                    return
+                for nota in pagina[1]:
+                    yield nota
+        finally:
+            # Cerrar el generador mientras otro hilo lo ejecuta daría "generator already executing"
+            if pendiente is not None and not pendiente.done():
+                await asyncio.wait({pendiente})
+            await asyncio.to_thread(paginas.close)
+
+def iterar_notas(cliente, base_params=None, fecha_inicio=None, fecha_fin=None, palabras=None, max_workers=4):
+    """Atajo para recorrer las notas de una consulta en streaming"""
+    return iter(ConsultaNotas(cliente, base_params, fecha_inicio, fecha_fin, palabras, max_workers))
@@ -1,12 +1,85 @@
+import argparse
+import hashlib
 import json
 import os
-from datetime import datetime
 
-def contar_noticias():
-    """Cuenta las noticias en el archivo JSON descargado"""
+import metricas
+import serializacion
+from catalogo_descargas import ARCHIVO_CATALOGO, CatalogoDescargas
+from duplicados import buscar_casi_duplicados, duplicados_exactos, indexar_notas
+from histogramas_fechas import CAMPOS_GRUPO, HistogramaFechas, histogramas_fechas, mostrar_histogramas
+from lectura_notas import CLAVES_NOTAS, LectorNotas
+
+def mostrar_ubicaciones(notas, posiciones, maximo=5):
+    """Muestra posición, fecha y programa de las notas indicadas"""
+    print(f"      Ubicaciones:")
+    for idx in posiciones[:maximo]:
+        nota = notas[idx]
+        fecha = nota.get('fecha', 'Sin fecha')
+        programa = nota.get('nombre_programa', 'Sin programa')
+        print(f"        • Posición {idx+1} - {fecha} - {programa}")
+    if len(posiciones) > maximo:
+        print(f"        • ... y {len(posiciones) - maximo} más")
+
+def mostrar_informacion_general(data):
+    """Muestra éxito, totales, filtros y metadatos de nivel superior del archivo"""
+    print("\n📊 INFORMACIÓN GENERAL:")
+    print(f"✅ Éxito: {data.get('success', 'No disponible')}")
+    print(f"📈 Total reportado: {data.get('total', 'No disponible')}")
+    print(f"🔢 Límite: {data.get('limit', 'No disponible')}")
+    
+    # Información de filtros
+    if 'filtros' in data:
+        filtros = data['filtros']
+        print(f"\n📅 PERÍODO CONSULTADO:")
+        print(f"   Fecha inicio: {filtros.get('fechaInicio', 'No disponible')}")
+        print(f"   Fecha fin: {filtros.get('fechaFin', 'No disponible')}")
+        print(f"   Palabras buscadas: {', '.join(filtros.get('palabrasBuscadas', []))}")
+    
+    # Información de metadata
+    if 'metadata' in data:
+        metadata = data['metadata']
+        print(f"\n📋 METADATOS:")
+        print(f"   Base de datos actual: {metadata.get('baseDatos', {}).get('actual', 'No disponible')}")
+        print(f"   Resultados actuales: {metadata.get('resultados', {}).get('actual', 'No disponible')}")
+        print(f"   Resultados históricos: {metadata.get('resultados', {}).get('historica', 'No disponible')}")
+
+def analizar_archivo(ruta, streaming=False, campos=()):
+    """Analiza un archivo en memoria o en streaming (siempre en streaming si es NDJSON o comprimido)
     
-    # Buscar el archivo JSON más reciente
-    json_file = None
+    'campos' (p. ej. ('fuente',)) añade el histograma por día de cada valor de esos campos.
+    """
+    if streaming or ruta.endswith(('.ndjson', '.jsonl', '.ndjson.gz', '.ndjson.zst')):
+        return contar_noticias_streaming(ruta, campos)
+    print(f"📁 Analizando archivo: {ruta}")
+    return contar_noticias_archivo(ruta, campos)
+
+def contar_noticias(json_file=None, modo='ultima', desde=None, hasta=None, catalogo=ARCHIVO_CATALOGO,
+                    streaming=False, campos=()):
+    """Cuenta las noticias de un archivo o de las descargas registradas en el catálogo
+    
+    Sin json_file las entradas se resuelven con el catálogo de descargas
+    (modo='ultima' o 'todas', filtrando por desde/hasta). Si el catálogo no
+    existe se recurre a buscar documento_completo.json en el árbol.
+    """
+    
+    if json_file:
+        return analizar_archivo(json_file, streaming, campos)
+    
+    catalogo = CatalogoDescargas(catalogo)
+    if os.path.exists(catalogo.ruta):
+        entradas = catalogo.resolver(modo, desde, hasta)
+        if not entradas:
+            print("❌ No hay descargas en el catálogo que cumplan los filtros")
+            return
+        for entrada in entradas:
+            print(f"\n🗂️  {entrada['ruta']} ({entrada['total']} noticias, descargado {entrada['fecha_descarga'][:19]})")
+            analizar_archivo(catalogo.ruta_absoluta(entrada), streaming, campos)
+        return
+    
+    # Sin catálogo: buscar el primer documento_completo.json (lento en árboles grandes)
+    print(f"⚠️  No existe {catalogo.ruta}; buscando documento_completo.json en el árbol "
+          f"(registra las descargas antiguas con: python catalogo_descargas.py registrar ...)")
     for root, dirs, files in os.walk('.'):
         for file in files:
             if file == 'documento_completo.json':
@@ -19,113 +92,192 @@ def contar_noticias():
         print("❌ No se encontró el archivo documento_completo.json")
         return
     
-    print(f"📁 Analizando archivo: {json_file}")
-    
+    return analizar_archivo(json_file, streaming, campos)
+
+def contar_noticias_archivo(json_file, campos=()):
+    """Analiza un archivo JSON cargándolo completo en memoria"""
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        print("\n📊 INFORMACIÓN GENERAL:")
-        print(f"✅ Éxito: {data.get('success', 'No disponible')}")
-        print(f"📈 Total reportado: {data.get('total', 'No disponible')}")
-        print(f"🔢 Límite: {data.get('limit', 'No disponible')}")
-        
-        # Información de filtros
-        if 'filtros' in data:
-            filtros = data['filtros']
-            print(f"\n📅 PERÍODO CONSULTADO:")
-            print(f"   Fecha inicio: {filtros.get('fechaInicio', 'No disponible')}")
-            print(f"   Fecha fin: {filtros.get('fechaFin', 'No disponible')}")
-            print(f"   Palabras buscadas: {', '.join(filtros.get('palabrasBuscadas', []))}")
+        with metricas.obtener().etapa('lectura_json'):
+            data = serializacion.cargar(json_file)
         
-        # Información de metadata
-        if 'metadata' in data:
-            metadata = data['metadata']
-            print(f"\n📋 METADATOS:")
-            print(f"   Base de datos actual: {metadata.get('baseDatos', {}).get('actual', 'No disponible')}")
-            print(f"   Resultados actuales: {metadata.get('resultados', {}).get('actual', 'No disponible')}")
-            print(f"   Resultados históricos: {metadata.get('resultados', {}).get('historica', 'No disponible')}")
+        mostrar_informacion_general(data)
         
-        # Contar noticias reales
-        if 'notas' in data and isinstance(data['notas'], list):
-            total_noticias = len(data['notas'])
+        # Contar noticias reales ('notas' en respuestas de la API, 'noticias' en los consolidados)
+        clave = next((c for c in CLAVES_NOTAS if isinstance(data.get(c), list)), None)
+        if clave:
+            total_noticias = len(data[clave])
             print(f"\n🔍 CONTEO REAL DE NOTICIAS:")
             print(f"   Número de noticias en el array: {total_noticias}")
             
-            # Analizar fechas de las noticias
-            fechas = []
-            for nota in data['notas']:
-                if 'fecha' in nota:
-                    fecha_str = nota['fecha']
-                    try:
-                        # Convertir a datetime para análisis
-                        fecha = datetime.fromisoformat(fecha_str.replace('Z', '+00:00'))
-                        fechas.append(fecha)
-                    except:
-                        fechas.append(fecha_str)
+            # Rango de fechas e histogramas (columnar, con numpy si está instalado)
+            with metricas.obtener().etapa('histogramas_fechas'):
+                histogramas = histogramas_fechas(data[clave], campos)
+            mostrar_histogramas(histogramas)
             
-            if fechas:
-                fechas_ordenadas = sorted(fechas)
-                print(f"   Fecha más antigua: {fechas_ordenadas[0]}")
-                print(f"   Fecha más reciente: {fechas_ordenadas[-1]}")
-                
-                # Contar por día
-                fechas_por_dia = {}
-                for fecha in fechas:
-                    if isinstance(fecha, datetime):
-                        dia = fecha.strftime('%Y-%m-%d')
-                    else:
-                        dia = str(fecha)[:10]  # Tomar solo la parte de la fecha
-                    
-                    fechas_por_dia[dia] = fechas_por_dia.get(dia, 0) + 1
-                
-                print(f"\n📅 NOTICIAS POR DÍA:")
-                for dia, cantidad in sorted(fechas_por_dia.items()):
-                    print(f"   {dia}: {cantidad} noticias")
-            
-            # Verificar si hay duplicados por título
-            titulos = [nota.get('titulo', '') for nota in data['notas'] if 'titulo' in nota]
-            titulos_unicos = set(titulos)
+            # Índices título/id construidos en una sola pasada
+            notas = data[clave]
+            with metricas.obtener().etapa('deduplicacion'):
+                por_titulo, por_id = indexar_notas(notas)
+            total_titulos = sum(len(posiciones) for posiciones in por_titulo.values())
             print(f"\n🔍 ANÁLISIS DE DUPLICADOS:")
-            print(f"   Total títulos: {len(titulos)}")
-            print(f"   Títulos únicos: {len(titulos_unicos)}")
-            print(f"   Duplicados: {len(titulos) - len(titulos_unicos)}")
+            print(f"   Total títulos: {total_titulos}")
+            print(f"   Títulos únicos: {len(por_titulo)}")
+            print(f"   Duplicados: {total_titulos - len(por_titulo)}")
+            
+            ids_repetidos = duplicados_exactos(por_id)
+            if ids_repetidos:
+                print(f"   IDs repetidos: {len(ids_repetidos)}")
             
             # Identificar duplicados específicos
-            from collections import Counter
-            contador_titulos = Counter(titulos)
-            duplicados = {titulo: count for titulo, count in contador_titulos.items() if count > 1}
+            duplicados = duplicados_exactos(por_titulo)
             
             if duplicados:
                 print(f"\n📋 NOTICIAS DUPLICADAS DETALLADAS:")
-                for i, (titulo, cantidad) in enumerate(sorted(duplicados.items(), key=lambda x: x[1], reverse=True), 1):
+                for i, (titulo, posiciones) in enumerate(sorted(duplicados.items(), key=lambda x: len(x[1]), reverse=True), 1):
                     print(f"\n   {i}. Título: '{titulo[:80]}{'...' if len(titulo) > 80 else ''}'")
-                    print(f"      Cantidad: {cantidad} veces")
-                    
-                    # Buscar las posiciones de este título duplicado
-                    posiciones = []
-                    for idx, nota in enumerate(data['notas']):
-                        if nota.get('titulo', '') == titulo:
-                            fecha = nota.get('fecha', 'Sin fecha')
-                            programa = nota.get('nombre_programa', 'Sin programa')
-                            posiciones.append(f"Posición {idx+1} - {fecha} - {programa}")
-                    
-                    print(f"      Ubicaciones:")
-                    for pos in posiciones[:5]:  # Mostrar máximo 5 ubicaciones
-                        print(f"        • {pos}")
-                    if len(posiciones) > 5:
-                        print(f"        • ... y {len(posiciones) - 5} más")
+                    print(f"      Cantidad: {len(posiciones)} veces")
+                    mostrar_ubicaciones(notas, posiciones)
             else:
                 print(f"\n✅ No se encontraron duplicados por título")
             
+            # Casi duplicados: la misma historia con pequeños cambios de redacción
+            with metricas.obtener().etapa('casi_duplicados'):
+                grupos = buscar_casi_duplicados(notas)
+            print(f"\n🔍 ANÁLISIS DE CASI DUPLICADOS (SimHash):")
+            print(f"   Grupos encontrados: {len(grupos)}")
+            print(f"   Noticias involucradas: {sum(len(grupo) for grupo in grupos)}")
+            
+            for i, grupo in enumerate(grupos[:10], 1):
+                titulo = notas[grupo[0]].get('titulo', 'Sin título')
+                programas = {notas[idx].get('nombre_programa', 'Sin programa') for idx in grupo}
+                print(f"\n   {i}. Título: '{titulo[:80]}{'...' if len(titulo) > 80 else ''}'")
+                print(f"      Cantidad: {len(grupo)} versiones en {len(programas)} programa(s)")
+                mostrar_ubicaciones(notas, grupo)
+            if len(grupos) > 10:
+                print(f"\n   ... y {len(grupos) - 10} grupos más")
+            
         else:
-            print("❌ No se encontró el array 'notas' en el JSON")
+            print("❌ No se encontró el array 'notas' (ni 'noticias') en el JSON")
             
     except json.JSONDecodeError as e:
         print(f"❌ Error al decodificar JSON: {e}")
     except Exception as e:
         print(f"❌ Error inesperado: {e}")
 
+def analizar_en_streaming(ruta, campos=()):
+    """Recorre las notas una sola vez y acumula totales, fechas y duplicados
+    
+    La memoria no depende del tamaño del archivo sino del número de días y de
+    títulos distintos (de cada título solo se guarda un hash de 8 bytes y la
+    posición de su primera aparición). Las fechas se acumulan por bloques en
+    un HistogramaFechas (ver histogramas_fechas.py).
+    """
+    lector = LectorNotas(ruta)
+    total_noticias = 0
+    total_titulos = 0
+    histograma = HistogramaFechas(campos)
+    primeras = {}  # hash del título -> posición de la primera aparición
+    ids_vistos = set()
+    ids_repetidos = set()
+    duplicados = {}  # hash del título -> {'titulo', 'cantidad', 'posiciones'}
+    
+    for idx, nota in enumerate(lector):
+        total_noticias += 1
+        
+        histograma.agregar(nota)
+        
+        if 'id' in nota:
+            clave_id = hashlib.blake2b(str(nota['id']).encode('utf-8'), digest_size=8).digest()
+            if clave_id in ids_vistos:
+                ids_repetidos.add(clave_id)
+            ids_vistos.add(clave_id)
+        
+        if 'titulo' in nota:
+            total_titulos += 1
+            clave = hashlib.blake2b(str(nota['titulo']).encode('utf-8'), digest_size=8).digest()
+            if clave not in primeras:
+                primeras[clave] = idx
+                continue
+            
+            detalle = duplicados.setdefault(clave, {
+                'titulo': nota['titulo'],
+                'cantidad': 1,
+                'posiciones': [(primeras[clave], None, None)]
+            })
+            detalle['cantidad'] += 1
+            if len(detalle['posiciones']) < 5:
+                detalle['posiciones'].append((idx, nota.get('fecha', 'Sin fecha'), nota.get('nombre_programa', 'Sin programa')))
+    
+    return {
+        'cabecera': lector.cabecera,
+        'total_noticias': total_noticias,
+        'fechas': histograma.resultado(),
+        'total_titulos': total_titulos,
+        'titulos_unicos': len(primeras),
+        'ids_repetidos': len(ids_repetidos),
+        'duplicados': duplicados
+    }
+
+def contar_noticias_streaming(ruta, campos=()):
+    """Análisis en una sola pasada con memoria acotada (JSON o NDJSON)"""
+    print(f"📁 Analizando archivo en streaming: {ruta}")
+    
+    try:
+        with metricas.obtener().etapa('analisis_streaming'):
+            resultado = analizar_en_streaming(ruta, campos)
+    except json.JSONDecodeError as e:
+        print(f"❌ Error al decodificar JSON: {e}")
+        return None
+    
+    mostrar_informacion_general(resultado['cabecera'])
+    
+    print(f"\n🔍 CONTEO REAL DE NOTICIAS:")
+    print(f"   Número de noticias en el array: {resultado['total_noticias']}")
+    mostrar_histogramas(resultado['fechas'])
+    
+    print(f"\n🔍 ANÁLISIS DE DUPLICADOS:")
+    print(f"   Total títulos: {resultado['total_titulos']}")
+    print(f"   Títulos únicos: {resultado['titulos_unicos']}")
+    print(f"   Duplicados: {resultado['total_titulos'] - resultado['titulos_unicos']}")
+    if resultado['ids_repetidos']:
+        print(f"   IDs repetidos: {resultado['ids_repetidos']}")
+    
+    duplicados = resultado['duplicados']
+    if duplicados:
+        print(f"\n📋 NOTICIAS DUPLICADAS DETALLADAS:")
+        ordenados = sorted(duplicados.values(), key=lambda d: d['cantidad'], reverse=True)
+        for i, detalle in enumerate(ordenados, 1):
+            titulo = detalle['titulo']
+            print(f"\n   {i}. Título: '{titulo[:80]}{'...' if len(titulo) > 80 else ''}'")
+            print(f"      Cantidad: {detalle['cantidad']} veces")
+            print(f"      Ubicaciones:")
+            for idx, fecha, programa in detalle['posiciones']:
+                if fecha is None:
+                    print(f"        • Posición {idx+1}")
+                else:
+                    print(f"        • Posición {idx+1} - {fecha} - {programa}")
+            if detalle['cantidad'] > len(detalle['posiciones']):
+                print(f"        • ... y {detalle['cantidad'] - len(detalle['posiciones'])} más")
+    else:
+        print(f"\n✅ No se encontraron duplicados por título")
+    
+    return resultado
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analiza noticias descargadas")
+    parser.add_argument('archivo', nargs='?',
+                        help="Archivo a analizar (por defecto, la última descarga del catálogo)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Análisis en una sola pasada con memoria acotada (siempre activo para NDJSON)")
+    parser.add_argument('--todas', action='store_true', help="Analizar todas las descargas del catálogo")
+    parser.add_argument('--desde', help="Solo descargas con notas desde esta fecha (YYYY-MM-DD)")
+    parser.add_argument('--hasta', help="Solo descargas con notas hasta esta fecha (YYYY-MM-DD)")
+    parser.add_argument('--catalogo', default=ARCHIVO_CATALOGO, help="Catálogo de descargas")
+    parser.add_argument('--por', action='append', choices=CAMPOS_GRUPO, default=[],
+                        help="Añadir el histograma por día de cada fuente o programa (se puede repetir)")
+    args = parser.parse_args()
+    
     print("🔍 Analizando noticias descargadas...")
-    contar_noticias()
+    contar_noticias(args.archivo, 'todas' if args.todas else 'ultima', args.desde, args.hasta,
+                    args.catalogo, args.streaming, args.por)
+    metricas.escribir_informes()
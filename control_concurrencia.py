@@ -0,0 +1,49 @@
+import threading
+import time
+
+class ControlAIMD:
+    """Limita las peticiones simultáneas y ajusta el límite según la respuesta del servidor
+
+    Sigue el esquema AIMD (aumento aditivo, disminución multiplicativa): cada
+    petición correcta con latencia por debajo de latencia_objetivo suma
+    1/límite (≈ +1 por cada ronda completa de peticiones), y un error (429,
+    5xx, timeout) o una latencia excesiva reduce el límite a la mitad, como
+    mucho una vez por intervalo_recorte para que una ráfaga de errores no lo
+    hunda hasta el mínimo.
+    """
+
+    def __init__(self, inicial=4, minimo=1, maximo=16, latencia_objetivo=2.0, intervalo_recorte=1.0):
+        self.limite = float(inicial)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.latencia_objetivo = latencia_objetivo
+        self.intervalo_recorte = intervalo_recorte
+        self.en_vuelo = 0
+        self.ultimo_recorte = 0.0
+        self.condicion = threading.Condition()
+
+    def adquirir(self):
+        """Espera hasta que haya hueco bajo el límite actual"""
+        with self.condicion:
+            while self.en_vuelo >= int(self.limite):
+                self.condicion.wait()
+            self.en_vuelo += 1
+
+    def liberar(self, exito, latencia):
+        """Registra el resultado de una petición y ajusta el límite"""
+        with self.condicion:
+            self.en_vuelo -= 1
+            anterior = int(self.limite)
+
+            if exito and latencia <= self.latencia_objetivo:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            else:
+                ahora = time.monotonic()
+                if ahora - self.ultimo_recorte >= self.intervalo_recorte:
+                    self.limite = max(self.minimo, self.limite / 2)
+                    self.ultimo_recorte = ahora
+
+            if int(self.limite) != anterior:
+                flecha = '⬆️' if int(self.limite) > anterior else '⬇️'
+                print(f"   🎚️  Concurrencia {flecha} {int(self.limite)}")
+            self.condicion.notify_all()
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+
+import serializacion
+
+# Directorio de los diarios de descargas en curso (se puede cambiar con NOTAS_DIARIO_DIR)
+DIRECTORIO_DIARIO = os.environ.get('NOTAS_DIARIO_DIR', '.diario_descargas')
+
+class DiarioDescargas:
+    """Diario en disco de las piezas (páginas o fragmentos) ya descargadas
+
+    Cada pieza completada se añade como una línea JSON ({pieza, total, notas})
+    y se hace fsync, así que si el proceso muere las piezas anteriores quedan a
+    salvo. El archivo se identifica por los parámetros de búsqueda y el modo de
+    descarga: al repetir la misma descarga se reanuda el mismo diario y solo se
+    piden las piezas que faltan. En memoria solo se guarda la posición de cada
+    pieza en el archivo. finalizar() lo borra cuando la salida ya está escrita.
+    """
+
+    def __init__(self, parametros, modo='paginas', directorio=DIRECTORIO_DIARIO):
+        clave = serializacion.volcar({'modo': modo, 'parametros': parametros}, indentado=False, ordenar_claves=True)
+        nombre = hashlib.sha256(clave.encode('utf-8')).hexdigest()[:24]
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta = os.path.join(directorio, f"{nombre}.ndjson")
+        self.indice = {}  # pieza -> (posición, longitud, total)
+        self.lock = threading.Lock()
+        self._cargar()
+        self.archivo = open(self.ruta, 'ab')
+
+    def _cargar(self):
+        """Indexa las piezas del diario existente y recorta una última línea a medio escribir"""
+        if not os.path.exists(self.ruta):
+            return
+        valido = 0
+        with open(self.ruta, 'rb') as f:
+            for linea in f:
+                if not linea.endswith(b'\n'):
+                    break
+                try:
+                    registro = serializacion.cargar_bytes(linea)
+                except ValueError:
+                    break
+                self.indice[registro['pieza']] = (valido, len(linea), registro.get('total'))
+                valido += len(linea)
+        if valido < os.path.getsize(self.ruta):
+            with open(self.ruta, 'r+b') as f:
+                f.truncate(valido)
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, pieza):
+        return pieza in self.indice
+
+    def obtener(self, pieza, total_esperado=None):
+        """Notas guardadas de una pieza, o None si no está (o si su 'total' ya no coincide)
+
+        En la paginación por 'page' las páginas solo siguen siendo válidas si el
+        total de la consulta no ha cambiado; si cambió, la pieza se vuelve a pedir.
+        """
+        with self.lock:
+            entrada = self.indice.get(pieza)
+            if entrada is None:
+                return None
+            posicion, longitud, total = entrada
+            if total_esperado is not None and total != total_esperado:
+                return None
+            with open(self.ruta, 'rb') as f:
+                f.seek(posicion)
+                return serializacion.cargar_bytes(f.read(longitud))['notas']
+
+    def obtener_con_total(self, pieza):
+        """(notas, total) guardados de una pieza, o None si no está"""
+        if pieza not in self.indice:
+            return None
+        return self.obtener(pieza), self.indice[pieza][2]
+
+    def registrar(self, pieza, notas, total=None):
+        """Añade una pieza completada y la fuerza a disco"""
+        linea = serializacion.volcar_bytes({'pieza': pieza, 'total': total, 'notas': notas}, indentado=False) + b'\n'
+        with self.lock:
+            posicion = self.archivo.seek(0, os.SEEK_END)
+            self.archivo.write(linea)
+            self.archivo.flush()
+            os.fsync(self.archivo.fileno())
+            self.indice[pieza] = (posicion, len(linea), total)
+
+    def close(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+    def finalizar(self):
+        """Borra el diario (la descarga terminó y la salida ya está guardada)"""
+        self.close()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
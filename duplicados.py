@@ -0,0 +1,122 @@
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+
+# SimHash de 64 bits partido en 6 bandas (de 10-11 bits): dos notas a distancia
+# de Hamming <= 5 coinciden por fuerza en al menos una banda (principio del palomar)
+BITS_SIMHASH = 64
+BANDAS = 6
+DISTANCIA_MAXIMA = BANDAS - 1
+TAMANO_SHINGLE = 3
+
+def normalizar_texto(texto):
+    """Minúsculas, sin acentos y sin signos de puntuación"""
+    # NFKD separa las tildes de su letra; al pasar a ASCII se descartan
+    texto = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'\w+', texto)
+
+def texto_nota(nota):
+    """Texto que identifica la historia: título más contenido (o resumen si no hay contenido)"""
+    cuerpo = nota.get('contenido') or nota.get('resumen') or ''
+    return f"{nota.get('titulo', '')} {cuerpo}"
+
+def simhash(palabras, tamano_shingle=TAMANO_SHINGLE):
+    """SimHash de 64 bits sobre shingles de palabras consecutivas
+
+    En lugar de sumar +1/-1 bit a bit, los votos de cada bit se cuentan con un
+    contador binario "en rebanadas": niveles[k] guarda el bit k del contador de
+    los 64 carriles a la vez, así cada shingle cuesta unas pocas operaciones
+    sobre enteros en vez de 64 iteraciones.
+    """
+    if len(palabras) < tamano_shingle:
+        shingles = [' '.join(palabras)] if palabras else []
+    else:
+        shingles = [' '.join(palabras[i:i + tamano_shingle]) for i in range(len(palabras) - tamano_shingle + 1)]
+
+    niveles = []
+    for shingle in shingles:
+        acarreo = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for k in range(len(niveles)):
+            if not acarreo:
+                break
+            niveles[k], acarreo = niveles[k] ^ acarreo, niveles[k] & acarreo
+        if acarreo:
+            niveles.append(acarreo)
+
+    # Un bit queda a 1 si más de la mitad de los shingles lo tienen a 1: se compara
+    # el contador de cada carril con el umbral, del bit más significativo al menor
+    umbral = len(shingles) // 2
+    mayor, igual = 0, (1 << BITS_SIMHASH) - 1
+    for k in range(max(len(niveles), umbral.bit_length()) - 1, -1, -1):
+        nivel = niveles[k] if k < len(niveles) else 0
+        if umbral >> k & 1:
+            igual &= nivel
+        else:
+            mayor |= igual & nivel
+            igual &= ~nivel
+    return mayor
+
+def distancia_hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def indexar_notas(notas):
+    """Construye en una sola pasada los índices título -> posiciones e id -> posiciones"""
+    por_titulo = defaultdict(list)
+    por_id = defaultdict(list)
+    for idx, nota in enumerate(notas):
+        if 'titulo' in nota:
+            por_titulo[nota['titulo']].append(idx)
+        if 'id' in nota:
+            por_id[nota['id']].append(idx)
+    return por_titulo, por_id
+
+def duplicados_exactos(indice):
+    """Entradas del índice (título o id) que aparecen más de una vez"""
+    return {clave: posiciones for clave, posiciones in indice.items() if len(posiciones) > 1}
+
+def buscar_casi_duplicados(notas, distancia_maxima=DISTANCIA_MAXIMA):
+    """Agrupa notas que cuentan la misma historia con pequeños cambios de redacción
+
+    Calcula un SimHash por nota, usa las bandas como cubetas LSH para obtener
+    candidatos y confirma cada par por distancia de Hamming. Devuelve la lista
+    de grupos (listas de posiciones) con más de una nota, de mayor a menor.
+    """
+    # Límites de cada banda: reparte los 64 bits lo más equitativamente posible
+    limites = [BITS_SIMHASH * banda // BANDAS for banda in range(BANDAS + 1)]
+    bandas = [(inicio, (1 << (fin - inicio)) - 1) for inicio, fin in zip(limites, limites[1:])]
+
+    huellas = [simhash(normalizar_texto(texto_nota(nota))) for nota in notas]
+    cubetas = defaultdict(list)
+    for idx, huella in enumerate(huellas):
+        for banda, (desplazamiento, mascara) in enumerate(bandas):
+            cubetas[(banda, huella >> desplazamiento & mascara)].append(idx)
+
+    # Union-find para unir los pares confirmados en grupos
+    padre = list(range(len(notas)))
+
+    def raiz(i):
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    for candidatos in cubetas.values():
+        if len(candidatos) < 2:
+            continue
+        # Las huellas idénticas se unen directamente; solo se comparan por pares las distintas
+        representantes = {}
+        for idx in candidatos:
+            primero = representantes.setdefault(huellas[idx], idx)
+            if primero != idx and raiz(primero) != raiz(idx):
+                padre[raiz(idx)] = raiz(primero)
+        distintos = list(representantes.values())
+        for pos, i in enumerate(distintos):
+            for j in distintos[pos + 1:]:
+                if raiz(i) != raiz(j) and distancia_hamming(huellas[i], huellas[j]) <= distancia_maxima:
+                    padre[raiz(j)] = raiz(i)
+
+    grupos = defaultdict(list)
+    for idx in range(len(notas)):
+        grupos[raiz(idx)].append(idx)
+    return sorted((g for g in grupos.values() if len(g) > 1), key=len, reverse=True)
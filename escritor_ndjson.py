@@ -0,0 +1,91 @@
+import os
+from datetime import datetime
+
+import metricas
+import serializacion
+
+# Clave que distingue los registros de cabecera/pie de las notas
+CLAVE_META = '_meta'
+
+class EscritorNDJSON:
+    """Escribe notas en formato NDJSON (una nota por línea) a medida que llegan
+
+    El archivo empieza con un registro de cabecera ({"_meta": "cabecera", ...})
+    y termina con un pie ({"_meta": "pie", "total": N, ...}); las líneas
+    intermedias son las notas tal cual las devuelve la API. Solo se mantiene en
+    memoria la página que se está escribiendo. Se escribe en <ruta>.tmp y solo
+    cerrar() lo renombra a la ruta final: si la descarga falla (abortar(), o
+    una excepción dentro del 'with') no queda un archivo parcial con pie.
+    """
+
+    def __init__(self, ruta, parametros_busqueda=None):
+        self.ruta = ruta
+        self.parametros_busqueda = parametros_busqueda or {}
+        self.total = 0
+        self.fecha_min = None
+        self.fecha_max = None
+        self.archivo = None
+
+    @property
+    def ruta_temporal(self):
+        return f"{self.ruta}.tmp"
+
+    def abrir(self):
+        self.archivo = open(self.ruta_temporal, 'wb')
+        self._escribir_registro({
+            CLAVE_META: 'cabecera',
+            'fecha_descarga': datetime.now().isoformat(),
+            'parametros_busqueda': self.parametros_busqueda
+        })
+        return self
+
+    def escribir_notas(self, notas):
+        """Añade una tanda de notas (lista o generador, se recorre una vez) y vacía el buffer"""
+        lineas = []
+        with metricas.obtener().etapa('escritura'):
+            for nota in notas:
+                lineas.append(serializacion.volcar_bytes(nota, indentado=False) + b'\n')
+                # Rango de fechas escrito, para el catálogo de descargas
+                fecha = nota.get('fecha')
+                if fecha:
+                    if self.fecha_min is None or fecha < self.fecha_min:
+                        self.fecha_min = fecha
+                    if self.fecha_max is None or fecha > self.fecha_max:
+                        self.fecha_max = fecha
+            self.archivo.writelines(lineas)
+            self.archivo.flush()
+        self.total += len(lineas)
+
+    def cerrar(self):
+        if self.archivo is None:
+            return
+        self._escribir_registro({
+            CLAVE_META: 'pie',
+            'total': self.total,
+            'fecha_fin': datetime.now().isoformat()
+        })
+        self.archivo.close()
+        self.archivo = None
+        os.replace(self.ruta_temporal, self.ruta)
+
+    def abortar(self):
+        """Cierra y borra el archivo a medio escribir (la descarga no terminó)"""
+        if self.archivo is None:
+            return
+        self.archivo.close()
+        self.archivo = None
+        # Sin excepciones aquí: se llama mientras se propaga el error de la descarga
+        if os.path.exists(self.ruta_temporal):
+            os.remove(self.ruta_temporal)
+
+    def _escribir_registro(self, registro):
+        self.archivo.write(serializacion.volcar_bytes(registro, indentado=False) + b'\n')
+
+    def __enter__(self):
+        return self.abrir()
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.abortar()
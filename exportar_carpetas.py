@@ -0,0 +1,113 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import metricas
+import serializacion
+
+def sanitize_filename(filename):
+    """Limpia el nombre del archivo para que sea válido en el sistema de archivos"""
+    # Remover caracteres no válidos y reemplazar espacios con guiones bajos
+    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = filename.replace(' ', '_')
+    # Limitar la longitud del nombre
+    return filename[:100]
+
+def nombre_carpeta(i, item, ancho=4):
+    """Nombre único de la carpeta de una noticia: número y título saneado"""
+    if 'titulo' in item:
+        return f"{i+1:0{ancho}d}_{sanitize_filename(item['titulo'])}"
+    elif 'title' in item:
+        return f"{i+1:0{ancho}d}_{sanitize_filename(item['title'])}"
+    return f"noticia_{i+1:0{ancho}d}"
+
+def preparar_noticia(i, item, ancho=4, fecha_creacion=None):
+    """Serializa una noticia y devuelve (carpeta, {archivo: texto}) listo para escribir"""
+    folder_name = nombre_carpeta(i, item, ancho)
+    archivos = {
+        # JSON completo de la noticia
+        'noticia_completa.json': serializacion.volcar(item)
+    }
+    
+    # Campos específicos si existen
+    if 'contenido' in item or 'content' in item:
+        archivos['contenido.txt'] = item.get('contenido', item.get('content', ''))
+    if 'resumen' in item or 'summary' in item:
+        archivos['resumen.txt'] = item.get('resumen', item.get('summary', ''))
+    
+    # Metadatos
+    metadata = {
+        'fecha_creacion': fecha_creacion or datetime.now().isoformat(),
+        'id_noticia': item.get('id', f'noticia_{i+1}'),
+        'fuente': item.get('fuente', item.get('source', 'Desconocida')),
+        'fecha_publicacion': item.get('fecha', item.get('date', 'No disponible')),
+        'numero_noticia': i + 1
+    }
+    archivos['metadatos.json'] = serializacion.volcar(metadata)
+    return folder_name, archivos
+
+def escribir_noticia(main_folder, preparada):
+    """Crea la carpeta de la noticia y escribe sus archivos; devuelve los bytes escritos"""
+    folder_name, archivos = preparada
+    item_folder = os.path.join(main_folder, folder_name)
+    os.makedirs(item_folder, exist_ok=True)
+    
+    escritos = 0
+    for nombre, texto in archivos.items():
+        datos = texto.encode('utf-8')
+        with open(os.path.join(item_folder, nombre), 'wb') as f:
+            f.write(datos)
+        escritos += len(datos)
+    return escritos
+
+def guardar_noticia(main_folder, i, item, ancho=4):
+    """Guarda una noticia en su carpeta: JSON completo, contenido, resumen y metadatos"""
+    preparada = preparar_noticia(i, item, ancho)
+    escribir_noticia(main_folder, preparada)
+    return preparada[0]
+
+def exportar_carpetas(notas, main_folder, ancho=4, max_workers=8, tamano_lote=500):
+    """Exporta cada noticia a su propia carpeta dentro de main_folder
+    
+    Las notas se serializan por lotes y sus archivos se escriben desde un pool
+    de max_workers hilos; mientras se escribe un lote se prepara el siguiente.
+    En sistemas de archivos en red lo que domina es la latencia por archivo, y
+    así se solapan muchas escrituras a la vez.
+    """
+    os.makedirs(main_folder, exist_ok=True)
+    fecha_creacion = datetime.now().isoformat()
+    inicio = time.perf_counter()
+    total_bytes = 0
+    guardadas = 0
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        en_vuelo = []
+        for desde in range(0, len(notas), tamano_lote):
+            lote = [
+                preparar_noticia(i, item, ancho, fecha_creacion)
+                for i, item in enumerate(notas[desde:desde + tamano_lote], start=desde)
+            ]
+            siguientes = [executor.submit(escribir_noticia, main_folder, preparada) for preparada in lote]
+            
+            # Esperar al lote anterior mientras el actual ya se está escribiendo
+            for futuro in en_vuelo:
+                total_bytes += futuro.result()
+            guardadas += len(en_vuelo)
+            if en_vuelo:
+                print(f"   📝 Guardadas {guardadas}/{len(notas)} noticias...")
+            en_vuelo = siguientes
+        
+        for futuro in en_vuelo:
+            total_bytes += futuro.result()
+        guardadas += len(en_vuelo)
+    
+    duracion = time.perf_counter() - inicio
+    metricas.obtener().observar('escritura_carpetas_segundos', duracion)
+    metricas.obtener().contar('bytes_escritos_carpetas', total_bytes)
+    if guardadas and duracion > 0:
+        print(f"   ⚡ {guardadas} noticias exportadas en {duracion:.2f} s "
+              f"({guardadas / duracion:.0f} noticias/s, {total_bytes / duracion / 1024 / 1024:.1f} MB/s, "
+              f"{max_workers} workers)")
+    return main_folder
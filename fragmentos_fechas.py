@@ -0,0 +1,129 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, timedelta
+
+import metricas
+
+def fragmentar_rango(fecha_inicio, fecha_fin, dias_por_fragmento=1):
+    """Divide el rango [fecha_inicio, fecha_fin] (YYYY-MM-DD) en ventanas de N días"""
+    inicio = date.fromisoformat(fecha_inicio)
+    fin = date.fromisoformat(fecha_fin)
+
+    fragmentos = []
+    while inicio <= fin:
+        fin_fragmento = min(inicio + timedelta(days=dias_por_fragmento - 1), fin)
+        fragmentos.append((inicio.isoformat(), fin_fragmento.isoformat()))
+        inicio = fin_fragmento + timedelta(days=1)
+    return fragmentos
+
+def partir_fragmento(inicio, fin):
+    """Parte un fragmento de varios días en dos mitades"""
+    d_inicio = date.fromisoformat(inicio)
+    d_fin = date.fromisoformat(fin)
+    mitad = d_inicio + timedelta(days=(d_fin - d_inicio).days // 2)
+    return [(inicio, mitad.isoformat()), ((mitad + timedelta(days=1)).isoformat(), fin)]
+
+def deduplicar_por_id(notas):
+    """Elimina notas repetidas por 'id' conservando la primera aparición"""
+    vistos = set()
+    unicas = []
+    for nota in notas:
+        nota_id = nota.get('id')
+        if nota_id is not None:
+            if nota_id in vistos:
+                continue
+            vistos.add(nota_id)
+        unicas.append(nota)
+    return unicas
+
+def consultar_fragmento(cliente, base_params, inicio, fin, limit=500, page=None, diario=None, total_esperado=None):
+    """Consulta un fragmento de fechas y devuelve (notas, total reportado)
+
+    Con 'diario' (un DiarioDescargas) los fragmentos ya descargados se leen del
+    diario y los nuevos se registran en él. Un fragmento guardado que no cabía
+    en 'limit' se vuelve a pedir para conocer el total actual, y sus páginas
+    guardadas solo se reutilizan si su total coincide con total_esperado.
+    """
+    pieza = f"fragmento:{inicio}:{fin}:{page or 0}"
+    if diario is not None:
+        if page is None:
+            guardado = diario.obtener_con_total(pieza)
+            if guardado is not None and guardado[1] <= len(guardado[0]):
+                return guardado
+        else:
+            notas = diario.obtener(pieza, total_esperado)
+            if notas is not None:
+                return notas, total_esperado
+
+    params = {**base_params, 'fechaInicio': inicio, 'fechaFin': fin, 'limit': limit}
+    if page is not None:
+        params['page'] = page
+
+    data = cliente.obtener_datos(params)
+    if isinstance(data, list):
+        notas, total = data, len(data)
+    elif isinstance(data, dict) and 'notas' in data:
+        notas, total = data['notas'], data.get('total', len(data['notas']))
+    else:
+        raise ValueError(f"Estructura inesperada en el fragmento {inicio} - {fin}")
+    if diario is not None:
+        diario.registrar(pieza, notas, total)
+    return notas, total
+
+def descargar_por_fragmentos(cliente, base_params, dias_por_fragmento=1, limit=500, max_workers=4, diario=None):
+    """Descarga el rango de base_params por fragmentos de fechas en paralelo
+
+    Es adaptativo: si un fragmento de varios días supera 'limit' se parte en dos
+    mitades, y solo un día suelto que lo supere se pagina. Las notas se devuelven
+    en orden cronológico de fragmentos y sin duplicados por 'id'. Con 'diario'
+    solo se consultan los fragmentos que no se completaron en una ejecución anterior.
+    """
+    fragmentos = fragmentar_rango(base_params['fechaInicio'], base_params['fechaFin'], dias_por_fragmento)
+    print(f"   🧩 {len(fragmentos)} fragmentos planificados con {max_workers} workers...")
+
+    resultados = {}  # (inicio, página) -> notas
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pendientes = {
+            executor.submit(consultar_fragmento, cliente, base_params, inicio, fin, limit, None, diario):
+                (inicio, fin, None)
+            for inicio, fin in fragmentos
+        }
+        while pendientes:
+            completados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in completados:
+                inicio, fin, page = pendientes.pop(futuro)
+                notas, total = futuro.result()
+
+                if page is not None:
+                    resultados[(inicio, page)] = notas
+                elif total <= len(notas):
+                    resultados[(inicio, 0)] = notas
+                    print(f"      ✅ {inicio} - {fin}: {len(notas)} noticias")
+                elif inicio != fin:
+                    # Fragmento demasiado grande: partirlo en dos mitades
+                    print(f"      ✂️  {inicio} - {fin}: {total} noticias, partiendo el fragmento")
+                    for sub_inicio, sub_fin in partir_fragmento(inicio, fin):
+                        futuro_nuevo = executor.submit(
+                            consultar_fragmento, cliente, base_params, sub_inicio, sub_fin, limit, None, diario
+                        )
+                        pendientes[futuro_nuevo] = (sub_inicio, sub_fin, None)
+                else:
+                    # Un solo día con más de 'limit' noticias: la respuesta ya es su página 1, se piden las demás
+                    total_paginas = math.ceil(total / limit)
+                    print(f"      📄 {inicio}: {total} noticias, paginando en {total_paginas} páginas")
+                    resultados[(inicio, 1)] = notas
+                    for pagina in range(2, total_paginas + 1):
+                        futuro_nuevo = executor.submit(
+                            consultar_fragmento, cliente, base_params, inicio, fin, limit, pagina, diario, total
+                        )
+                        pendientes[futuro_nuevo] = (inicio, fin, pagina)
+
+    todas_las_noticias = []
+    for clave in sorted(resultados):
+        todas_las_noticias.extend(resultados[clave])
+
+    with metricas.obtener().etapa('deduplicacion'):
+        noticias_unicas = deduplicar_por_id(todas_las_noticias)
+    print(f"\n   🎉 Total de noticias descargadas: {len(noticias_unicas)} "
+          f"({len(todas_las_noticias) - len(noticias_unicas)} duplicadas descartadas)")
+    return noticias_unicas
@@ -0,0 +1,306 @@
+from collections import Counter
+from datetime import date
+
+# numpy si está instalado; si no, los mismos histogramas con Counter sobre el texto de las fechas
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BACKEND = 'numpy' if np is not None else 'python'
+TAMANO_BLOQUE = 100000
+DIAS_SEMANA = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+CAMPOS_GRUPO = ('fuente', 'nombre_programa')
+
+def _cifras(codigos, inicio, fin):
+    """Número formado por las cifras de las columnas [inicio, fin) y máscara de filas con solo cifras"""
+    valor = np.zeros(len(codigos), dtype=np.int64)
+    solo_cifras = np.ones(len(codigos), dtype=bool)
+    for columna in range(inicio, fin):
+        cifra = codigos[:, columna]
+        valor = valor * 10 + cifra
+        solo_cifras &= (cifra >= 0) & (cifra <= 9)
+    return valor, solo_cifras
+
+def _dos_cifras(texto):
+    return int(texto) if len(texto) == 2 and '0' <= texto[0] <= '9' and '0' <= texto[1] <= '9' else 0
+
+def _orden_fecha(fecha):
+    """Clave para comparar fechas válidas por su valor y no por su texto
+
+    Igual que la clave numérica de _histogramas_numpy(): el separador ('T' o
+    ' ') no cuenta, y una fecha sin hora, minutos o segundos vale 0 en ellos.
+    """
+    return (fecha[:10], _dos_cifras(fecha[11:13]) if len(fecha) > 10 else 0,
+            _dos_cifras(fecha[14:16]), _dos_cifras(fecha[17:19]))
+
+def _extremos(fechas, claves):
+    """(mínima, máxima) por _orden_fecha, comparando completas solo las fechas del día y hora extremos
+
+    'claves' son los prefijos 'YYYY-MM-DDTHH' válidos del bloque: con ellos se
+    eligen la primera y la última hora y se recorren las fechas una sola vez.
+    """
+    primera = _orden_fecha(min(claves, key=_orden_fecha))[:2]
+    ultima = _orden_fecha(max(claves, key=_orden_fecha))[:2]
+    prefijos = {clave for clave in claves if _orden_fecha(clave)[:2] in (primera, ultima)}
+    candidatas = [fecha for fecha in fechas if fecha[:13] in prefijos]
+    return (min(candidatas, key=_orden_fecha)[:19], max(candidatas, key=_orden_fecha)[:19])
+
+def _histogramas_numpy(fechas, grupos):
+    """Histogramas de un bloque con numpy, sin parsear cada fecha en Python
+
+    Los textos se copian a un array 'U19' y se leen como códigos UTF-32: año,
+    mes, día, hora, minuto y segundo salen con aritmética sobre columnas, y los
+    conteos con np.unique/np.bincount.
+    """
+    textos = np.array(fechas, dtype='U19')
+    codigos = textos.view(np.uint32).reshape(len(textos), 19).astype(np.int32) - ord('0')
+    anio, ok_anio = _cifras(codigos, 0, 4)
+    mes, ok_mes = _cifras(codigos, 5, 7)
+    dia, ok_dia = _cifras(codigos, 8, 10)
+    guion = ord('-') - ord('0')
+    validas = (ok_anio & ok_mes & ok_dia & (codigos[:, 4] == guion) & (codigos[:, 7] == guion)
+               & (mes >= 1) & (mes <= 12) & (dia >= 1))
+    # Día del calendario: mes como datetime64[M] más los días; si se sale del mes, la fecha no es válida
+    meses = (np.where(validas, anio, 1970) - 1970) * 12 + np.where(validas, mes, 1) - 1
+    dias = meses.astype('datetime64[M]').astype('datetime64[D]') + (np.where(validas, dia, 1) - 1)
+    validas &= dias.astype('datetime64[M]').astype(np.int64) == meses
+
+    # Hora: 0 si solo hay fecha; si no, separador 'T' o ' ' y dos cifras menores que 24
+    solo_dia = codigos[:, 10] == -ord('0')
+    separador = (codigos[:, 10] == ord('T') - ord('0')) | (codigos[:, 10] == ord(' ') - ord('0'))
+    hora, ok_hora = _cifras(codigos, 11, 13)
+    validas &= solo_dia | (separador & ok_hora & (hora < 24))
+    invalidas = int(len(textos) - validas.sum())
+    if not validas.any():
+        return None, invalidas
+
+    minuto, ok_minuto = _cifras(codigos, 14, 16)
+    segundo, ok_segundo = _cifras(codigos, 17, 19)
+    hora = np.where(solo_dia, 0, hora)[validas]
+    numero_dia = dias.astype(np.int64)[validas]
+    clave = (numero_dia * 86400 + hora * 3600 + np.where(ok_minuto, minuto, 0)[validas] * 60
+             + np.where(ok_segundo, segundo, 0)[validas])
+    textos = textos[validas]
+
+    # Los días de un bloque suelen ser pocos y seguidos: bincount sobre el rango en lugar de ordenar
+    primer_dia = numero_dia.min()
+    if numero_dia.max() - primer_dia < 4 * len(numero_dia) + 366:
+        cuentas = np.bincount(numero_dia - primer_dia)
+        dias_unicos = np.nonzero(cuentas)[0]
+        posicion = np.zeros(len(cuentas), dtype=np.int64)
+        posicion[dias_unicos] = np.arange(len(dias_unicos))
+        indice_dia = posicion[numero_dia - primer_dia]
+        cuentas = cuentas[dias_unicos]
+        dias_unicos = dias_unicos + primer_dia
+    else:
+        dias_unicos, indice_dia, cuentas = np.unique(numero_dia, return_inverse=True, return_counts=True)
+    etiquetas = [str(d) for d in dias_unicos.astype('datetime64[D]')]
+    bloque = {
+        'fecha_min': str(textos[clave.argmin()]),
+        'fecha_max': str(textos[clave.argmax()]),
+        'por_dia': dict(zip(etiquetas, cuentas.tolist())),
+        'por_hora': np.bincount(hora, minlength=24).tolist(),
+        # El 1970-01-01 fue jueves (3 si el lunes es 0)
+        'por_dia_semana': np.bincount((numero_dia + 3) % 7, minlength=7).tolist(),
+        'por_grupo': {}
+    }
+    for campo, valores in grupos.items():
+        # Los valores distintos son pocos: se numeran con un diccionario en lugar de ordenar textos
+        numeros = {}
+        indice_valor = np.array([numeros.setdefault(valor, len(numeros)) for valor in valores])[validas]
+        valores_unicos = [str(valor) for valor in numeros]
+        # Una celda por (valor, día): bincount sobre el índice combinado
+        conteo = np.bincount(indice_valor * len(dias_unicos) + indice_dia,
+                             minlength=len(valores_unicos) * len(dias_unicos))
+        conteo = conteo.reshape(len(valores_unicos), len(dias_unicos))
+        filas, columnas = np.nonzero(conteo)
+        bloque['por_grupo'][campo] = {
+            (str(valores_unicos[f]), etiquetas[c]): int(conteo[f, c]) for f, c in zip(filas, columnas)
+        }
+    return bloque, invalidas
+
+def _histogramas_python(fechas, grupos):
+    """Histogramas de un bloque sin numpy: se cuenta el texto 'YYYY-MM-DDTHH' y se valida cada clave distinta"""
+    try:
+        por_dia_hora = Counter(fecha[:13] for fecha in fechas)
+    except TypeError:
+        fechas = [str(fecha) for fecha in fechas]
+        por_dia_hora = Counter(fecha[:13] for fecha in fechas)
+
+    dias_semana = {}
+    for dia in {clave[:10] for clave in por_dia_hora}:
+        if len(dia) != 10 or dia[4] != '-' or dia[7] != '-':
+            continue
+        try:
+            dias_semana[dia] = date.fromisoformat(dia).weekday()
+        except ValueError:
+            pass
+
+    por_dia = Counter()
+    por_hora = [0] * 24
+    por_dia_semana = [0] * 7
+    claves_validas = set()
+    invalidas = 0
+    for clave, cantidad in por_dia_hora.items():
+        dia, hora = clave[:10], clave[11:13]
+        if (dia not in dias_semana or (len(clave) > 10 and clave[10] not in 'T ')
+                or (len(clave) > 10 and not (len(hora) == 2 and hora.isdigit() and int(hora) < 24))):
+            invalidas += cantidad
+            continue
+        claves_validas.add(clave)
+        por_dia[dia] += cantidad
+        por_hora[int(hora) if hora else 0] += cantidad
+        por_dia_semana[dias_semana[dia]] += cantidad
+    if not por_dia:
+        return None, invalidas
+
+    filas = range(len(fechas))
+    if invalidas:
+        filas = [fila for fila in filas if fechas[fila][:13] in claves_validas]
+        fechas = [fechas[fila] for fila in filas]
+    fecha_min, fecha_max = _extremos(fechas, claves_validas)
+    bloque = {
+        'fecha_min': fecha_min,
+        'fecha_max': fecha_max,
+        'por_dia': dict(por_dia),
+        'por_hora': por_hora,
+        'por_dia_semana': por_dia_semana,
+        'por_grupo': {}
+    }
+    for campo, valores in grupos.items():
+        if invalidas:
+            valores = [valores[fila] for fila in filas]
+        bloque['por_grupo'][campo] = dict(Counter(
+            (str(valor), fecha[:10]) for valor, fecha in zip(valores, fechas)
+        ))
+    return bloque, invalidas
+
+class HistogramaFechas:
+    """Acumula rango de fechas e histogramas por día, hora y día de la semana
+
+    Las fechas (y los campos de 'campos', p. ej. fuente o nombre_programa) se
+    guardan como columnas de texto y se procesan por bloques de tamano_bloque:
+    con numpy cada bloque se descompone en año/mes/día/hora con operaciones
+    sobre columnas y se cuenta con np.unique/np.bincount; sin numpy se cuentan
+    los prefijos 'YYYY-MM-DDTHH' y solo se valida cada prefijo distinto. La memoria queda acotada por el bloque,
+    así que sirve igual para un archivo en memoria y para el modo streaming.
+    Las horas y los días son los del texto de la fecha (sin convertir de zona).
+    """
+
+    def __init__(self, campos=(), tamano_bloque=TAMANO_BLOQUE, usar_numpy=None):
+        self.campos = tuple(campos)
+        self.tamano_bloque = tamano_bloque
+        self.usar_numpy = np is not None if usar_numpy is None else usar_numpy and np is not None
+        self.fechas = []
+        self.grupos = {campo: [] for campo in self.campos}
+        self.total = 0
+        self.sin_fecha = 0
+        self.invalidas = 0
+        self.fecha_min = None
+        self.fecha_max = None
+        self.por_dia = Counter()
+        self.por_hora = [0] * 24
+        self.por_dia_semana = [0] * 7
+        self.por_grupo = {campo: Counter() for campo in self.campos}
+
+    def agregar(self, nota):
+        """Añade una nota (modo streaming)"""
+        self.fechas.append(nota.get('fecha') or '')
+        for campo in self.campos:
+            self.grupos[campo].append(nota.get(campo) or f"Sin {campo}")
+        if len(self.fechas) >= self.tamano_bloque:
+            self._procesar_bloque()
+
+    def agregar_notas(self, notas):
+        """Añade una lista de notas extrayendo cada columna de una vez"""
+        for inicio in range(0, len(notas), self.tamano_bloque):
+            parte = notas[inicio:inicio + self.tamano_bloque]
+            self.fechas = [nota.get('fecha') or '' for nota in parte]
+            for campo in self.campos:
+                self.grupos[campo] = [nota.get(campo) or f"Sin {campo}" for nota in parte]
+            self._procesar_bloque()
+
+    def _procesar_bloque(self):
+        if not self.fechas:
+            return
+        # Las notas sin fecha llevan '' y las dos implementaciones las cuentan como no válidas
+        sin_fecha = self.fechas.count('')
+        calcular = _histogramas_numpy if self.usar_numpy else _histogramas_python
+        bloque, invalidas = calcular(self.fechas, self.grupos)
+        self.total += len(self.fechas)
+        self.sin_fecha += sin_fecha
+        self.invalidas += invalidas - sin_fecha
+        self.fechas = []
+        self.grupos = {campo: [] for campo in self.campos}
+        if bloque is None:
+            return
+
+        if self.fecha_min is None or _orden_fecha(bloque['fecha_min']) < _orden_fecha(self.fecha_min):
+            self.fecha_min = bloque['fecha_min']
+        if self.fecha_max is None or _orden_fecha(bloque['fecha_max']) > _orden_fecha(self.fecha_max):
+            self.fecha_max = bloque['fecha_max']
+        self.por_dia.update(bloque['por_dia'])
+        self.por_hora = [a + b for a, b in zip(self.por_hora, bloque['por_hora'])]
+        self.por_dia_semana = [a + b for a, b in zip(self.por_dia_semana, bloque['por_dia_semana'])]
+        for campo, conteo in bloque['por_grupo'].items():
+            self.por_grupo[campo].update(conteo)
+
+    def resultado(self):
+        """Procesa lo pendiente y devuelve un diccionario con el rango y los histogramas"""
+        self._procesar_bloque()
+        por_grupo = {}
+        for campo, conteo in self.por_grupo.items():
+            tabla = {}
+            for (valor, dia), cantidad in sorted(conteo.items()):
+                tabla.setdefault(valor, {})[dia] = cantidad
+            por_grupo[campo] = tabla
+        return {
+            'total': self.total,
+            'sin_fecha': self.sin_fecha,
+            'fechas_invalidas': self.invalidas,
+            'fecha_min': self.fecha_min,
+            'fecha_max': self.fecha_max,
+            'por_dia': dict(sorted(self.por_dia.items())),
+            'por_hora': self.por_hora,
+            'por_dia_semana': dict(zip(DIAS_SEMANA, self.por_dia_semana)),
+            'por_grupo': por_grupo
+        }
+
+def histogramas_fechas(notas, campos=(), usar_numpy=None):
+    """Atajo: histogramas de fechas de una lista de notas"""
+    histograma = HistogramaFechas(campos, usar_numpy=usar_numpy)
+    histograma.agregar_notas(notas)
+    return histograma.resultado()
+
+def mostrar_histogramas(resultado, top=10):
+    """Muestra el rango de fechas y los histogramas por día, hora, día de la semana y grupo"""
+    if resultado['fecha_min']:
+        print(f"   Fecha más antigua: {resultado['fecha_min']}")
+        print(f"   Fecha más reciente: {resultado['fecha_max']}")
+    if resultado['sin_fecha'] or resultado['fechas_invalidas']:
+        print(f"   Sin fecha: {resultado['sin_fecha']} - Fechas no válidas: {resultado['fechas_invalidas']}")
+    if not resultado['por_dia']:
+        return
+
+    print(f"\n📅 NOTICIAS POR DÍA:")
+    for dia, cantidad in resultado['por_dia'].items():
+        print(f"   {dia}: {cantidad} noticias")
+
+    maximo = max(resultado['por_hora']) or 1
+    print(f"\n🕐 NOTICIAS POR HORA:")
+    for hora, cantidad in enumerate(resultado['por_hora']):
+        print(f"   {hora:02d}h: {cantidad:6d} {'█' * round(30 * cantidad / maximo)}")
+
+    print(f"\n📆 NOTICIAS POR DÍA DE LA SEMANA:")
+    for dia, cantidad in resultado['por_dia_semana'].items():
+        print(f"   {dia}: {cantidad}")
+
+    for campo, tabla in resultado['por_grupo'].items():
+        print(f"\n📊 NOTICIAS POR DÍA Y {campo.upper()}:")
+        ordenados = sorted(tabla.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        for valor, por_dia in ordenados[:top]:
+            detalle = ', '.join(f"{dia[5:]}: {cantidad}" for dia, cantidad in por_dia.items())
+            print(f"   {valor} ({sum(por_dia.values())}): {detalle}")
+        if len(ordenados) > top:
+            print(f"   ... y {len(ordenados) - top} más")
@@ -0,0 +1,197 @@
+import argparse
+import os
+import sqlite3
+
+import serializacion
+from duplicados import normalizar_texto
+from lectura_notas import LectorNotas
+
+ARCHIVO_INDICE = 'indice_noticias.db'
+TAMANO_LOTE = 1000
+
+# Pesos BM25 por columna: título > resumen > contenido
+PESOS_BM25 = (3.0, 2.0, 1.0)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS documentos (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    titulo TEXT,
+    fecha TEXT,
+    fuente TEXT,
+    nombre_programa TEXT,
+    nota_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documentos_fecha ON documentos (fecha);
+CREATE INDEX IF NOT EXISTS idx_documentos_fuente ON documentos (fuente);
+CREATE TABLE IF NOT EXISTS archivos_indexados (
+    ruta TEXT PRIMARY KEY,
+    mtime REAL,
+    tamano INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notas_fts USING fts5(
+    titulo, resumen, contenido,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+class IndiceTexto:
+    """Índice invertido local sobre titulo, resumen y contenido de las notas descargadas
+
+    Usa FTS5 de SQLite: las listas de posiciones permiten buscar frases exactas,
+    la clasificación es BM25 (pesando más el título) y el tokenizador ignora
+    mayúsculas y acentos. Los filtros por fecha y fuente se resuelven con los
+    índices de la tabla 'documentos'. Indexar de nuevo una nota solo reescribe
+    su entrada si cambió, y los archivos ya indexados sin cambios se saltan.
+    """
+
+    def __init__(self, ruta=ARCHIVO_INDICE):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        self.conexion.executescript(ESQUEMA)
+
+    def indexar_notas(self, notas, tamano_lote=TAMANO_LOTE):
+        """Añade o actualiza notas en el índice; devuelve cuántas se (re)indexaron"""
+        indexadas = 0
+        lote = []
+        for nota in notas:
+            lote.append(nota)
+            if len(lote) >= tamano_lote:
+                indexadas += self._indexar_lote(lote)
+                lote = []
+        if lote:
+            indexadas += self._indexar_lote(lote)
+        return indexadas
+
+    def _indexar_lote(self, lote):
+        indexadas = 0
+        with self.conexion:
+            for nota in lote:
+                nota_json = serializacion.volcar(nota, indentado=False, ordenar_claves=True)
+                nota_id = nota.get('id')
+                if nota_id is not None:
+                    existente = self.conexion.execute(
+                        'SELECT rowid, nota_json FROM documentos WHERE id = ?', (nota_id,)
+                    ).fetchone()
+                    if existente:
+                        if existente[1] == nota_json:
+                            continue
+                        # La nota cambió: borrar la entrada anterior antes de reindexar
+                        self.conexion.execute('DELETE FROM notas_fts WHERE rowid = ?', (existente[0],))
+                        self.conexion.execute('DELETE FROM documentos WHERE rowid = ?', (existente[0],))
+
+                cursor = self.conexion.execute(
+                    'INSERT INTO documentos (id, titulo, fecha, fuente, nombre_programa, nota_json) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (nota_id, nota.get('titulo'), nota.get('fecha'), nota.get('fuente'),
+                     nota.get('nombre_programa'), nota_json)
+                )
+                self.conexion.execute(
+                    'INSERT INTO notas_fts (rowid, titulo, resumen, contenido) VALUES (?, ?, ?, ?)',
+                    (cursor.lastrowid, nota.get('titulo', ''), nota.get('resumen', ''), nota.get('contenido', ''))
+                )
+                indexadas += 1
+        return indexadas
+
+    def indexar_archivo(self, ruta):
+        """Indexa un archivo descargado (JSON o NDJSON) si es nuevo o cambió desde la última vez"""
+        estado = os.stat(ruta)
+        ruta_abs = os.path.abspath(ruta)
+        previo = self.conexion.execute(
+            'SELECT mtime, tamano FROM archivos_indexados WHERE ruta = ?', (ruta_abs,)
+        ).fetchone()
+        if previo == (estado.st_mtime, estado.st_size):
+            return 0
+
+        indexadas = self.indexar_notas(LectorNotas(ruta))
+        with self.conexion:
+            self.conexion.execute(
+                'INSERT OR REPLACE INTO archivos_indexados (ruta, mtime, tamano) VALUES (?, ?, ?)',
+                (ruta_abs, estado.st_mtime, estado.st_size)
+            )
+        return indexadas
+
+    def buscar(self, consulta, fecha_inicio=None, fecha_fin=None, fuente=None, frase=False, limite=20):
+        """Busca notas por texto y devuelve [(puntuación, nota, fragmento)] de mejor a peor
+
+        Todas las palabras de la consulta deben aparecer (en cualquier columna);
+        con frase=True deben aparecer seguidas y en ese orden.
+        """
+        palabras = normalizar_texto(consulta)
+        if not palabras:
+            return []
+        if frase:
+            expresion = '"' + ' '.join(palabras) + '"'
+        else:
+            expresion = ' '.join(f'"{palabra}"' for palabra in palabras)
+
+        condiciones = ['notas_fts MATCH ?']
+        valores = [expresion]
+        if fecha_inicio:
+            condiciones.append('d.fecha >= ?')
+            valores.append(fecha_inicio)
+        if fecha_fin:
+            # Las fechas son ISO: todo lo que empiece por fecha_fin es anterior a fecha_fin + '~'
+            condiciones.append('d.fecha < ?')
+            valores.append(f"{fecha_fin}~")
+        if fuente:
+            condiciones.append('d.fuente = ?')
+            valores.append(fuente)
+        valores.append(limite)
+
+        filas = self.conexion.execute(
+            f"SELECT bm25(notas_fts, {', '.join(map(str, PESOS_BM25))}) AS puntuacion, d.nota_json, "
+            "snippet(notas_fts, -1, '[', ']', '…', 12) "
+            "FROM notas_fts JOIN documentos d ON d.rowid = notas_fts.rowid "
+            f"WHERE {' AND '.join(condiciones)} ORDER BY puntuacion LIMIT ?",
+            valores
+        ).fetchall()
+        # bm25() devuelve valores negativos: cuanto menor, más relevante
+        return [(-puntuacion, serializacion.cargar_bytes(nota_json), fragmento) for puntuacion, nota_json, fragmento in filas]
+
+    def contar(self):
+        return self.conexion.execute('SELECT COUNT(*) FROM documentos').fetchone()[0]
+
+    def close(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de texto completo sobre las noticias descargadas")
+    parser.add_argument('--indice', default=ARCHIVO_INDICE, help="Base de datos del índice")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p_indexar = subparsers.add_parser('indexar', help="Indexa archivos descargados (JSON o NDJSON)")
+    p_indexar.add_argument('archivos', nargs='+')
+
+    p_buscar = subparsers.add_parser('buscar', help="Busca noticias por texto")
+    p_buscar.add_argument('consulta')
+    p_buscar.add_argument('--desde', help="Fecha inicial (YYYY-MM-DD)")
+    p_buscar.add_argument('--hasta', help="Fecha final (YYYY-MM-DD)")
+    p_buscar.add_argument('--fuente')
+    p_buscar.add_argument('--frase', action='store_true', help="Buscar las palabras seguidas y en orden")
+    p_buscar.add_argument('-n', '--limite', type=int, default=20)
+    args = parser.parse_args()
+
+    with IndiceTexto(args.indice) as indice:
+        if args.comando == 'indexar':
+            for archivo in args.archivos:
+                indexadas = indice.indexar_archivo(archivo)
+                print(f"📚 {archivo}: {indexadas} noticias indexadas")
+            print(f"✅ Total en el índice: {indice.contar()} noticias")
+        else:
+            resultados = indice.buscar(args.consulta, args.desde, args.hasta, args.fuente, args.frase, args.limite)
+            print(f"🔍 {len(resultados)} resultados para '{args.consulta}'")
+            for i, (puntuacion, nota, fragmento) in enumerate(resultados, 1):
+                print(f"\n   {i}. {nota.get('titulo', 'Sin título')[:80]}  (BM25: {puntuacion:.2f})")
+                print(f"      {nota.get('fecha', 'Sin fecha')} - {nota.get('fuente', 'Sin fuente')} - "
+                      f"{nota.get('nombre_programa', 'Sin programa')}")
+                print(f"      {fragmento}")
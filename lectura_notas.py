@@ -0,0 +1,135 @@
+import json
+
+import serializacion
+from escritor_ndjson import CLAVE_META
+
+# Claves de nivel superior que contienen el array de notas según el formato:
+# 'notas' en las respuestas de la API, 'noticias' en los archivos consolidados
+CLAVES_NOTAS = ('notas', 'noticias')
+TAMANO_BLOQUE = 1024 * 1024
+ESPACIOS = ' \t\n\r'
+
+class LectorNotas:
+    """Itera las notas de un archivo descargado sin cargarlo completo en memoria
+
+    Admite NDJSON (.ndjson/.jsonl, una nota por línea), los archivos
+    comprimidos por bloques (.ndjson.gz/.ndjson.zst, ver archivo_notas.py) y los JSON existentes
+    ({'notas': [...]} de la API o {'noticias': [...]} de los consolidados). En
+    los JSON el array se decodifica elemento a elemento con un parser
+    incremental, y el resto de campos de nivel superior (total, filtros,
+    metadata...) quedan en self.cabecera. Mientras se itera solo hay en memoria
+    un bloque del archivo y la nota actual.
+    """
+
+    def __init__(self, ruta, tamano_bloque=TAMANO_BLOQUE):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.cabecera = {}
+
+    def __iter__(self):
+        if self.ruta.endswith(('.ndjson.gz', '.ndjson.zst')):
+            return self._iterar_comprimido()
+        if self.ruta.endswith(('.ndjson', '.jsonl')):
+            return self._iterar_ndjson()
+        return self._iterar_json()
+
+    def _iterar_ndjson(self):
+        with open(self.ruta, 'rb') as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                registro = serializacion.cargar_bytes(linea)
+                if CLAVE_META in registro:
+                    self.cabecera.update({k: v for k, v in registro.items() if k != CLAVE_META})
+                else:
+                    yield registro
+
+    def _iterar_comprimido(self):
+        from archivo_notas import LectorArchivo
+
+        lector = LectorArchivo(self.ruta)
+        self.cabecera.update(lector.cabecera)
+        yield from lector
+
+    def _iterar_json(self):
+        decoder = json.JSONDecoder()
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            self._archivo = f
+            self._buf = ''
+            self._pos = 0
+            self._fin = False
+
+            if self._siguiente_caracter() == '[':
+                # Archivo con una lista directa de notas
+                yield from self._iterar_array(decoder)
+                return
+
+            self._esperar('{')
+            if self._siguiente_caracter() == '}':
+                return
+            while True:
+                clave = self._decodificar(decoder)
+                self._esperar(':')
+                if clave in CLAVES_NOTAS and self._siguiente_caracter() == '[':
+                    yield from self._iterar_array(decoder)
+                else:
+                    self.cabecera[clave] = self._decodificar(decoder)
+                if self._esperar(',}') == '}':
+                    return
+
+    def _iterar_array(self, decoder):
+        self._esperar('[')
+        if self._siguiente_caracter() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decodificar(decoder)
+            if self._esperar(',]') == ']':
+                return
+
+    def _leer_mas(self):
+        """Añade un bloque al buffer descartando lo ya consumido; False si no queda archivo"""
+        if self._fin:
+            return False
+        bloque = self._archivo.read(self.tamano_bloque)
+        self._buf = self._buf[self._pos:] + bloque
+        self._pos = 0
+        if not bloque:
+            self._fin = True
+        return bool(bloque)
+
+    def _siguiente_caracter(self):
+        """Salta espacios y devuelve el siguiente carácter sin consumirlo ('' al final)"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ESPACIOS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._leer_mas():
+                return ''
+
+    def _esperar(self, permitidos):
+        caracter = self._siguiente_caracter()
+        if not caracter or caracter not in permitidos:
+            raise json.JSONDecodeError(f"Se esperaba uno de {permitidos!r}", self._buf, self._pos)
+        self._pos += 1
+        return caracter
+
+    def _decodificar(self, decoder):
+        """Decodifica el siguiente valor JSON, leyendo más bloques si está incompleto"""
+        self._siguiente_caracter()
+        while True:
+            try:
+                valor, fin = decoder.raw_decode(self._buf, self._pos)
+                # Un número al final del buffer podría continuar en el siguiente bloque
+                if fin < len(self._buf) or self._fin:
+                    self._pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self._fin:
+                    raise
+            self._leer_mas()
+
+def iterar_notas(ruta):
+    """Atajo para recorrer las notas de un archivo en streaming"""
+    return iter(LectorNotas(ruta))
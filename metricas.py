@@ -0,0 +1,161 @@
+import contextlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import serializacion
+
+# Si alguna está definida, las métricas se activan al importar el módulo
+ARCHIVO_INFORME = os.environ.get('NOTAS_METRICAS')
+ARCHIVO_PROMETHEUS = os.environ.get('NOTAS_METRICAS_PROMETHEUS')
+
+PREFIJO_PROMETHEUS = 'noticias'
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+class MetricasNulas:
+    """Modo sin métricas: mismos métodos que Metricas pero no hacen nada"""
+
+    activo = False
+    _contexto = contextlib.nullcontext()
+
+    def etapa(self, nombre):
+        return self._contexto
+
+    def observar(self, nombre, valor):
+        pass
+
+    def contar(self, nombre, valor=1):
+        pass
+
+class Metricas:
+    """Acumula tiempos por etapa, distribuciones y contadores de una ejecución
+
+    - etapa(nombre): context manager que cronometra un bloque (segundos)
+    - observar(nombre, valor): añade una muestra a una distribución (bytes, latencias...)
+    - contar(nombre, valor): suma a un contador
+
+    Es seguro usarlo desde varios hilos. informe() devuelve un resumen con
+    total, mínimo, máximo, p50 y p99 de cada distribución.
+    """
+
+    activo = True
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fecha_inicio = datetime.now().isoformat()
+        self.muestras = {}
+        self.contadores = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(f"{nombre}_segundos", time.perf_counter() - inicio)
+
+    def observar(self, nombre, valor):
+        with self.lock:
+            self.muestras.setdefault(nombre, []).append(valor)
+
+    def contar(self, nombre, valor=1):
+        with self.lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + valor
+
+    def informe(self):
+        with self.lock:
+            muestras = {nombre: list(valores) for nombre, valores in self.muestras.items()}
+            contadores = dict(self.contadores)
+
+        distribuciones = {}
+        for nombre, valores in sorted(muestras.items()):
+            distribuciones[nombre] = {
+                'n': len(valores),
+                'total': sum(valores),
+                'min': min(valores),
+                'max': max(valores),
+                'p50': percentil(valores, 50),
+                'p99': percentil(valores, 99)
+            }
+        return {
+            'fecha_inicio': self.fecha_inicio,
+            'duracion_segundos': time.perf_counter() - self.inicio,
+            'distribuciones': distribuciones,
+            'contadores': dict(sorted(contadores.items()))
+        }
+
+    def guardar_json(self, ruta):
+        serializacion.guardar(ruta, self.informe(), indentado=True)
+
+    def guardar_prometheus(self, ruta):
+        """Escribe las métricas en el formato de texto de Prometheus (para el textfile collector)"""
+        informe = self.informe()
+        lineas = []
+        for nombre, d in informe['distribuciones'].items():
+            metrica = nombre_prometheus(nombre)
+            lineas.append(f"# TYPE {metrica} summary")
+            lineas.append(f'{metrica}{{quantile="0.5"}} {d["p50"]}')
+            lineas.append(f'{metrica}{{quantile="0.99"}} {d["p99"]}')
+            lineas.append(f"{metrica}_sum {d['total']}")
+            lineas.append(f"{metrica}_count {d['n']}")
+        for nombre, valor in informe['contadores'].items():
+            metrica = f"{nombre_prometheus(nombre)}_total"
+            lineas.append(f"# TYPE {metrica} counter")
+            lineas.append(f"{metrica} {valor}")
+        metrica = nombre_prometheus('duracion_segundos')
+        lineas.append(f"# TYPE {metrica} gauge")
+        lineas.append(f"{metrica} {informe['duracion_segundos']}")
+
+        # Escritura atómica: el collector nunca lee un archivo a medias
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lineas) + '\n')
+        os.replace(temporal, ruta)
+
+def nombre_prometheus(nombre):
+    return f"{PREFIJO_PROMETHEUS}_{re.sub(r'[^a-zA-Z0-9_]', '_', nombre)}"
+
+_actual = MetricasNulas()
+
+def obtener():
+    """Registro de métricas en uso (MetricasNulas si no se activaron)"""
+    return _actual
+
+def activar():
+    """Activa la recogida de métricas y devuelve el registro nuevo"""
+    global _actual
+    _actual = Metricas()
+    return _actual
+
+def desactivar():
+    global _actual
+    _actual = MetricasNulas()
+
+def escribir_informes(archivo_informe=None, archivo_prometheus=None):
+    """Guarda el informe JSON y/o el archivo Prometheus si las métricas están activas
+
+    Por defecto usa las rutas de NOTAS_METRICAS y NOTAS_METRICAS_PROMETHEUS.
+    """
+    if not _actual.activo:
+        return
+    archivo_informe = archivo_informe or ARCHIVO_INFORME
+    archivo_prometheus = archivo_prometheus or ARCHIVO_PROMETHEUS
+    if archivo_informe:
+        _actual.guardar_json(archivo_informe)
+        print(f"📈 Informe de métricas: {archivo_informe}")
+    if archivo_prometheus:
+        _actual.guardar_prometheus(archivo_prometheus)
+        print(f"📈 Métricas Prometheus: {archivo_prometheus}")
+
+if ARCHIVO_INFORME or ARCHIVO_PROMETHEUS:
+    activar()
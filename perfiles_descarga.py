@@ -0,0 +1,335 @@
+import argparse
+import math
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import ExitStack, closing
+from datetime import date, datetime, timedelta
+
+import metricas
+import serializacion
+from almacen_sqlite import AlmacenNotas
+from archivo_notas import EscritorArchivo, es_archivo_comprimido
+from catalogo_descargas import registrar_descarga
+from cliente_notas import ClienteNotas
+from diario_descargas import DiarioDescargas
+from escritor_ndjson import EscritorNDJSON
+from fragmentos_fechas import consultar_fragmento, partir_fragmento
+from planificador_consultas import PALABRAS_PERMITIDAS, normalizar_palabras
+
+ARCHIVO_PERFILES = 'perfiles.json'
+LIMIT = 500
+
+def cargar_perfiles(ruta=ARCHIVO_PERFILES):
+    """Lee el archivo de perfiles y devuelve {nombre: perfil} con las palabras normalizadas
+
+    El archivo es un JSON {"perfiles": {nombre: {"palabras", "fechaInicio",
+    "fechaFin", "salida"}}}; 'salida' es opcional (por defecto un JSON
+    perfil_<nombre>_<timestamp>.json) y su extensión decide el formato: .json,
+    .ndjson, .ndjson.gz/.ndjson.zst (ver archivo_notas.py) o .db (ver almacen_sqlite.py).
+    """
+    configuracion = serializacion.cargar(ruta)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    perfiles = {}
+    for nombre, perfil in configuracion.get('perfiles', {}).items():
+        faltan = [campo for campo in ('palabras', 'fechaInicio', 'fechaFin') if not perfil.get(campo)]
+        if faltan:
+            raise ValueError(f"Al perfil '{nombre}' le falta: {', '.join(faltan)}")
+        palabras = normalizar_palabras(perfil['palabras'])
+        if not palabras:
+            raise ValueError(f"El perfil '{nombre}' no tiene palabras permitidas")
+        if perfil['fechaInicio'] > perfil['fechaFin']:
+            raise ValueError(f"En el perfil '{nombre}' fechaInicio es posterior a fechaFin")
+        perfiles[nombre] = {
+            'palabras': palabras,
+            'fechaInicio': perfil['fechaInicio'],
+            'fechaFin': perfil['fechaFin'],
+            'salida': perfil.get('salida') or f"perfil_{nombre}_{timestamp}.json"
+        }
+    if not perfiles:
+        raise ValueError(f"No hay perfiles en {ruta}")
+    return perfiles
+
+def dias_del_rango(fecha_inicio, fecha_fin):
+    inicio = date.fromisoformat(fecha_inicio)
+    return [(inicio + timedelta(days=n)).isoformat()
+            for n in range((date.fromisoformat(fecha_fin) - inicio).days + 1)]
+
+def agrupar_dias_seguidos(dias):
+    """Convierte una lista de días (YYYY-MM-DD) en rangos (inicio, fin) de días seguidos"""
+    rangos = []
+    for dia in sorted(dias):
+        if rangos and date.fromisoformat(rangos[-1][1]) + timedelta(days=1) == date.fromisoformat(dia):
+            rangos[-1][1] = dia
+        else:
+            rangos.append([dia, dia])
+    return [tuple(rango) for rango in rangos]
+
+def planificar_perfiles(perfiles):
+    """Calcula las peticiones que cubren las celdas (palabra, día) de todos los perfiles una sola vez
+
+    Cada celda se asigna al conjunto de perfiles que la necesitan. Las
+    palabras que en un mismo día sirven exactamente a los mismos perfiles se
+    piden juntas (la API devuelve la unión), y los días seguidos con las mismas
+    palabras y perfiles se piden como un solo rango. Así cada nota descargada
+    va a todos los perfiles de su petición sin tener que adivinar qué palabra
+    la encontró.
+    """
+    celdas = defaultdict(set)  # (palabra, día) -> perfiles que la necesitan
+    celdas_pedidas = 0
+    for nombre, perfil in perfiles.items():
+        for dia in dias_del_rango(perfil['fechaInicio'], perfil['fechaFin']):
+            for palabra in perfil['palabras']:
+                celdas[(palabra, dia)].add(nombre)
+                celdas_pedidas += 1
+
+    palabras_por_dia = defaultdict(set)  # (día, perfiles) -> palabras
+    for (palabra, dia), nombres in celdas.items():
+        palabras_por_dia[(dia, frozenset(nombres))].add(palabra)
+
+    dias_por_grupo = defaultdict(list)  # (perfiles, palabras) -> días
+    for (dia, nombres), palabras in palabras_por_dia.items():
+        dias_por_grupo[(nombres, frozenset(palabras))].append(dia)
+
+    peticiones = []
+    for (nombres, palabras), dias in dias_por_grupo.items():
+        for inicio, fin in agrupar_dias_seguidos(dias):
+            peticiones.append({
+                'palabras': ', '.join(p for p in PALABRAS_PERMITIDAS if p in palabras),
+                'fechaInicio': inicio,
+                'fechaFin': fin,
+                'perfiles': sorted(nombres)
+            })
+    peticiones.sort(key=lambda p: (p['fechaInicio'], p['palabras'], p['perfiles']))
+    return {
+        'peticiones': peticiones,
+        'celdas_pedidas': celdas_pedidas,
+        'celdas_unicas': len(celdas)
+    }
+
+class DiarioPeticion:
+    """Vista de un DiarioDescargas compartido limitada a las piezas de una petición
+
+    consultar_fragmento() nombra las piezas por fechas y página; aquí se les
+    antepone las palabras de la petición, así todas las peticiones del plan
+    comparten un único diario (y un único archivo abierto).
+    """
+
+    def __init__(self, diario, palabras):
+        self.diario = diario
+        self.prefijo = f"peticion:{palabras}"
+
+    def obtener(self, pieza, total_esperado=None):
+        return self.diario.obtener(f"{self.prefijo}:{pieza}", total_esperado)
+
+    def obtener_con_total(self, pieza):
+        return self.diario.obtener_con_total(f"{self.prefijo}:{pieza}")
+
+    def registrar(self, pieza, notas, total=None):
+        self.diario.registrar(f"{self.prefijo}:{pieza}", notas, total)
+
+class SalidaPerfil:
+    """Salida de un perfil: recibe notas de varias peticiones y escribe cada 'id' una sola vez
+
+    Como context manager, si la descarga falla se llama a abortar() en lugar
+    de cerrar(): los archivos a medio escribir se borran en vez de quedar como
+    descargas completas.
+    """
+
+    def __init__(self, nombre, perfil):
+        self.nombre = nombre
+        self.ruta = perfil['salida']
+        self.parametros = {k: perfil[k] for k in ('fechaInicio', 'fechaFin')}
+        self.parametros['palabras'] = ', '.join(perfil['palabras'])
+        self.ids = set()
+        self.total = 0
+        self.almacen = None
+        self.escritor = None
+        self.notas = None
+        self.cerrada = False
+        if self.ruta.endswith(('.db', '.sqlite', '.sqlite3')):
+            self.almacen = AlmacenNotas(self.ruta)
+        elif es_archivo_comprimido(self.ruta):
+            self.escritor = EscritorArchivo(self.ruta, self.parametros).abrir()
+        elif self.ruta.endswith(('.ndjson', '.jsonl')):
+            self.escritor = EscritorNDJSON(self.ruta, self.parametros).abrir()
+        else:
+            self.notas = []
+
+    def escribir_notas(self, notas):
+        # Una nota puede llegar por dos peticiones del mismo perfil (p. ej. con dos de sus palabras)
+        nuevas = []
+        for nota in notas:
+            nota_id = nota.get('id')
+            if nota_id is not None:
+                if nota_id in self.ids:
+                    continue
+                self.ids.add(nota_id)
+            nuevas.append(nota)
+        self.total += len(nuevas)
+        if self.almacen is not None:
+            self.almacen.insertar_notas(nuevas)
+        elif self.escritor is not None:
+            self.escritor.escribir_notas(nuevas)
+        else:
+            self.notas.extend(nuevas)
+
+    def cerrar(self):
+        """Cierra la salida y registra el archivo en el catálogo (salvo las bases SQLite)"""
+        if self.cerrada:
+            return
+        self.cerrada = True
+        if self.almacen is not None:
+            self.almacen.close()
+            return
+        if self.escritor is not None:
+            self.escritor.cerrar()
+            registrar_descarga(self.ruta, self.parametros, origen='perfiles_descarga', total=self.escritor.total,
+                               fecha_min=self.escritor.fecha_min, fecha_max=self.escritor.fecha_max)
+            return
+        self.notas.sort(key=lambda nota: nota.get('fecha') or '')
+        with metricas.obtener().etapa('escritura'):
+            serializacion.guardar(self.ruta, {
+                'total': len(self.notas),
+                'fecha_descarga': datetime.now().isoformat(),
+                'parametros_busqueda': self.parametros,
+                'noticias': self.notas
+            })
+        registrar_descarga(self.ruta, self.parametros, self.notas, origen='perfiles_descarga')
+
+    def abortar(self):
+        """Libera la salida sin darla por completa
+
+        Las notas ya insertadas en SQLite se conservan (el almacén salta las
+        repetidas al reanudar); los archivos NDJSON o comprimidos se borran y
+        el JSON no llega a escribirse.
+        """
+        if self.cerrada:
+            return
+        self.cerrada = True
+        if self.almacen is not None:
+            self.almacen.close()
+        elif self.escritor is not None:
+            self.escritor.abortar()
+        self.notas = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+def descargar_peticiones(cliente, peticiones, salidas, limit=LIMIT, max_workers=4, diario=None):
+    """Descarga todas las peticiones en un solo pool y reparte las notas entre las salidas
+
+    Igual que descargar_por_fragmentos(): un rango que supera 'limit' se parte
+    en dos mitades y un día suelto que lo supere se pagina. Cada pieza se
+    reparte en cuanto llega, así que en memoria solo están las piezas en vuelo.
+    Con 'diario' (un DiarioDescargas compartido por todas las peticiones) las
+    piezas ya descargadas en una ejecución anterior no se vuelven a pedir.
+    Devuelve el número de piezas descargadas.
+    """
+    diarios = {}
+    if diario is not None:
+        diarios = {numero: DiarioPeticion(diario, peticion['palabras']) for numero, peticion in enumerate(peticiones)}
+    pendientes = {}
+
+    def pedir(executor, numero, inicio, fin, page=None, total=None):
+        params = {'palabras': peticiones[numero]['palabras']}
+        futuro = executor.submit(consultar_fragmento, cliente, params, inicio, fin, limit, page,
+                                 diarios.get(numero), total)
+        pendientes[futuro] = (numero, inicio, fin, page)
+
+    piezas = 0
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        try:
+            for numero, peticion in enumerate(peticiones):
+                pedir(executor, numero, peticion['fechaInicio'], peticion['fechaFin'])
+            while pendientes:
+                completados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in completados:
+                    numero, inicio, fin, page = pendientes.pop(futuro)
+                    notas, total = futuro.result()
+                    piezas += 1
+
+                    if page is None and total > len(notas):
+                        if inicio != fin:
+                            for sub_inicio, sub_fin in partir_fragmento(inicio, fin):
+                                pedir(executor, numero, sub_inicio, sub_fin)
+                            continue
+                        # Un día suelto: la respuesta ya es su página 1, se piden las demás
+                        for pagina in range(2, math.ceil(total / limit) + 1):
+                            pedir(executor, numero, inicio, fin, pagina, total)
+                        page = 1
+
+                    for nombre in peticiones[numero]['perfiles']:
+                        salidas[nombre].escribir_notas(notas)
+                    print(f"      ✅ {peticiones[numero]['palabras']} {inicio} - {fin}"
+                          f"{f' (página {page})' if page else ''}: {len(notas)} noticias "
+                          f"-> {', '.join(peticiones[numero]['perfiles'])}")
+        finally:
+            # Si algo falla, no se piden las piezas que aún no empezaron
+            for futuro in pendientes:
+                futuro.cancel()
+    return piezas
+
+def descargar_perfiles(ruta_perfiles=ARCHIVO_PERFILES, max_workers=4, reanudable=True, solo_plan=False):
+    """Descarga de una vez las notas de todos los perfiles del archivo y escribe la salida de cada uno"""
+    perfiles = cargar_perfiles(ruta_perfiles)
+    plan = planificar_perfiles(perfiles)
+
+    print(f"🧭 {len(perfiles)} perfiles, {plan['celdas_pedidas']} celdas (palabra, día) pedidas, "
+          f"{plan['celdas_unicas']} distintas")
+    print(f"   📋 {len(plan['peticiones'])} peticiones en lugar de una descarga por perfil:")
+    for peticion in plan['peticiones']:
+        print(f"      • {peticion['palabras']} {peticion['fechaInicio']} - {peticion['fechaFin']} "
+              f"-> {', '.join(peticion['perfiles'])}")
+    if solo_plan:
+        return plan
+
+    # Todo se abre dentro de la pila: si algo falla a medias, lo ya abierto se cierra
+    # (y las salidas se abortan) en orden inverso
+    with ExitStack() as pila:
+        diario = None
+        if reanudable:
+            diario = pila.enter_context(closing(DiarioDescargas(
+                {'peticiones': [[p['palabras'], p['fechaInicio'], p['fechaFin']] for p in plan['peticiones']]},
+                'perfiles'
+            )))
+            if len(diario):
+                print(f"♻️  Reanudando: {len(diario)} piezas ya descargadas en {diario.ruta}")
+        cliente = pila.enter_context(ClienteNotas(pool_size=max(max_workers, 1)))
+        salidas = {nombre: pila.enter_context(SalidaPerfil(nombre, perfil)) for nombre, perfil in perfiles.items()}
+
+        print(f"\n1️⃣ Descargando con {max_workers} workers...")
+        with metricas.obtener().etapa('descarga'):
+            piezas = descargar_peticiones(cliente, plan['peticiones'], salidas, max_workers=max_workers,
+                                          diario=diario)
+
+        print(f"\n2️⃣ Guardando la salida de cada perfil ({piezas} piezas descargadas)...")
+        for salida in salidas.values():
+            salida.cerrar()
+            print(f"   ✅ {salida.nombre}: {salida.total} noticias -> {salida.ruta}")
+        # Las salidas ya están escritas: el diario ya no hace falta
+        if diario is not None:
+            diario.finalizar()
+    return plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga varios perfiles de búsqueda compartiendo las peticiones")
+    parser.add_argument('perfiles', nargs='?', default=ARCHIVO_PERFILES,
+                        help=f"Archivo JSON con los perfiles (default: {ARCHIVO_PERFILES})")
+    parser.add_argument('--workers', type=int, default=4, help="Peticiones simultáneas")
+    parser.add_argument('--plan', action='store_true', help="Solo mostrar las peticiones planificadas")
+    parser.add_argument('--no-reanudable', action='store_true', help="No usar el diario de descargas")
+    args = parser.parse_args()
+
+    try:
+        descargar_perfiles(args.perfiles, args.workers, not args.no_reanudable, args.plan)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    metricas.escribir_informes()
@@ -0,0 +1,166 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from duplicados import normalizar_texto
+
+# Palabras que acepta la API en 'palabras'
+PALABRAS_PERMITIDAS = ['leyes', 'ley', 'comercio exterior', 'aduanas', 'aduana', 'turismo']
+
+# Campo que se añade a cada nota con las palabras que la encontraron
+CAMPO_COINCIDENCIAS = 'palabras_coincidentes'
+
+# Si la suma de los totales por palabra supera en más de este factor al total
+# combinado, las consultas por palabra descargarían demasiadas notas repetidas
+REDUNDANCIA_MAXIMA = 1.5
+
+def normalizar_palabras(palabras):
+    """Convierte 'palabras' (texto separado por comas o lista) en una lista sin repetidos
+
+    Pasa a minúsculas, colapsa espacios y conserva el orden de la primera
+    aparición. Las palabras que la API no permite se descartan con un aviso.
+    """
+    if isinstance(palabras, str):
+        palabras = palabras.split(',')
+
+    normalizadas = []
+    for palabra in palabras:
+        palabra = re.sub(r'\s+', ' ', palabra).strip().lower()
+        if not palabra or palabra in normalizadas:
+            continue
+        if palabra not in PALABRAS_PERMITIDAS:
+            print(f"   ⚠️  Palabra no permitida por la API, se ignora: '{palabra}'")
+            continue
+        normalizadas.append(palabra)
+    return normalizadas
+
+def consultar_total(cliente, base_params, palabras):
+    """Total de notas de una consulta, pidiendo una sola nota"""
+    data = cliente.obtener_datos({**base_params, 'palabras': palabras, 'limit': 1})
+    if isinstance(data, list):
+        return len(data)
+    return data.get('total', len(data.get('notas', [])))
+
+def planificar_consulta(cliente, base_params, max_workers=4, limit=500, redundancia_maxima=REDUNDANCIA_MAXIMA):
+    """Decide entre una consulta combinada y una por palabra a partir de los totales
+
+    Pide en paralelo el total de la consulta combinada y el de cada palabra.
+    Se usa una consulta por palabra cuando la combinada no cabe en una página y
+    la suma de totales por palabra no supera redundancia_maxima veces el total
+    combinado (es decir, las palabras se solapan poco).
+    """
+    palabras = normalizar_palabras(base_params['palabras'])
+    combinada = ', '.join(palabras)
+    plan = {
+        'modo': 'combinada',
+        'palabras': palabras,
+        'total_combinado': None,
+        'totales_por_palabra': {}
+    }
+    if not palabras:
+        raise ValueError("No hay palabras permitidas que consultar")
+
+    consultas = [combinada] + (palabras if len(palabras) > 1 else [])
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(consultas)))) as executor:
+        totales = list(executor.map(lambda p: consultar_total(cliente, base_params, p), consultas))
+
+    plan['total_combinado'] = totales[0]
+    plan['totales_por_palabra'] = dict(zip(palabras, totales[1:])) if len(palabras) > 1 else {palabras[0]: totales[0]}
+
+    suma = sum(plan['totales_por_palabra'].values())
+    if len(palabras) > 1 and plan['total_combinado'] > limit and suma <= redundancia_maxima * plan['total_combinado']:
+        plan['modo'] = 'por_palabra'
+
+    paginas_combinada = math.ceil(plan['total_combinado'] / limit)
+    paginas_por_palabra = sum(math.ceil(total / limit) for total in plan['totales_por_palabra'].values())
+    plan['paginas'] = paginas_por_palabra if plan['modo'] == 'por_palabra' else paginas_combinada
+    return plan
+
+def palabras_en_texto(nota, palabras):
+    """Palabras de la lista que aparecen (como palabras completas) en el texto de la nota"""
+    texto = ' '.join(normalizar_texto(
+        f"{nota.get('titulo', '')} {nota.get('resumen', '')} {nota.get('contenido', '')}"
+    ))
+    texto = f" {texto} "
+    return [palabra for palabra in palabras if f" {' '.join(normalizar_texto(palabra))} " in texto]
+
+def descargar_consulta_pagina(cliente, base_params, palabras, page, limit, diario=None, total_esperado=None):
+    """Descarga una página de la consulta de 'palabras' (del diario si ya está con el mismo total)"""
+    pieza = f"consulta:{palabras}:pagina:{page}"
+    if diario is not None:
+        notas = diario.obtener(pieza, total_esperado)
+        if notas is not None:
+            return notas
+
+    params = {**base_params, 'palabras': palabras, 'limit': limit, 'page': page}
+    data = cliente.obtener_datos(params)
+    if isinstance(data, list):
+        notas, total = data, len(data)
+    elif isinstance(data, dict) and 'notas' in data:
+        notas, total = data['notas'], data.get('total')
+    else:
+        raise ValueError(f"Estructura inesperada en la página {page} de '{palabras}'")
+    if diario is not None:
+        diario.registrar(pieza, notas, total)
+    return notas
+
+def descargar_con_plan(cliente, base_params, plan, max_workers=4, limit=500, diario=None):
+    """Ejecuta el plan y devuelve las notas fusionadas por 'id' en orden de fecha
+
+    Cada nota lleva en 'palabras_coincidentes' las palabras que la encontraron:
+    en el modo por palabra son las consultas que la devolvieron; en el modo
+    combinado se deducen buscando las palabras en su título, resumen y contenido.
+    Con 'diario' las páginas ya descargadas (con el mismo total) no se vuelven a pedir.
+    """
+    if plan['modo'] == 'por_palabra':
+        consultas = [(palabra, total) for palabra, total in plan['totales_por_palabra'].items() if total]
+    else:
+        consultas = [(', '.join(plan['palabras']), plan['total_combinado'])]
+
+    # Todas las páginas de todas las consultas comparten el mismo pool
+    tareas = [
+        (palabras, page, total)
+        for palabras, total in consultas
+        for page in range(1, math.ceil(total / limit) + 1)
+    ]
+    print(f"   🧵 Descargando {len(tareas)} páginas de {len(consultas)} consulta(s) con {max_workers} workers...")
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        paginas = list(executor.map(
+            lambda tarea: descargar_consulta_pagina(cliente, base_params, tarea[0], tarea[1], limit, diario, tarea[2]),
+            tareas
+        ))
+
+    por_id = {}
+    notas = []
+    for (palabras, _, _), notas_pagina in zip(tareas, paginas):
+        for nota in notas_pagina:
+            nota_id = nota.get('id')
+            if nota_id is not None and nota_id in por_id:
+                # En el modo combinado 'palabras' es la consulta entera: las coincidencias ya salen del texto
+                coincidencias = por_id[nota_id][CAMPO_COINCIDENCIAS]
+                if plan['modo'] == 'por_palabra' and palabras not in coincidencias:
+                    coincidencias.append(palabras)
+                continue
+            if plan['modo'] == 'por_palabra':
+                nota = {**nota, CAMPO_COINCIDENCIAS: [palabras]}
+            else:
+                nota = {**nota, CAMPO_COINCIDENCIAS: palabras_en_texto(nota, plan['palabras'])}
+            if nota_id is not None:
+                por_id[nota_id] = nota
+            notas.append(nota)
+
+    total_descargadas = sum(len(notas_pagina) for notas_pagina in paginas)
+    print(f"   🔗 {len(notas)} notas únicas ({total_descargadas - len(notas)} repetidas entre consultas)")
+    return sorted(notas, key=lambda nota: nota.get('fecha') or '')
+
+def obtener_noticias_planificadas(cliente, base_params, max_workers=4, limit=500, diario=None):
+    """Planifica la consulta de 'palabras', la ejecuta y devuelve las notas fusionadas"""
+    plan = planificar_consulta(cliente, base_params, max_workers, limit)
+    print(f"   🧭 Total combinado: {plan['total_combinado']}")
+    for palabra, total in plan['totales_por_palabra'].items():
+        print(f"      • {palabra}: {total}")
+    if plan['modo'] == 'por_palabra':
+        print(f"   🧭 Plan: una consulta por palabra ({plan['paginas']} páginas)")
+    else:
+        print(f"   🧭 Plan: consulta combinada ({plan['paginas']} páginas)")
+    return descargar_con_plan(cliente, base_params, plan, max_workers, limit, diario)
@@ -0,0 +1,54 @@
+import json
+import os
+
+# Backend de JSON: orjson si está instalado (se puede forzar la librería estándar con NOTAS_JSON_BACKEND=json)
+try:
+    if os.environ.get('NOTAS_JSON_BACKEND', 'orjson') != 'orjson':
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Los archivos se escriben compactos salvo que se pida lo contrario (NOTAS_JSON_INDENTADO=1)
+INDENTADO = os.environ.get('NOTAS_JSON_INDENTADO', '').lower() in ('1', 'true', 'si', 'sí')
+
+def cargar_bytes(datos):
+    """Decodifica JSON directamente desde bytes (o str), sin pasar antes a texto"""
+    if orjson is not None:
+        return orjson.loads(datos)
+    return json.loads(datos)
+
+def volcar_bytes(obj, indentado=None, ordenar_claves=False):
+    """Serializa a bytes UTF-8; compacto por defecto y con sangría de 2 espacios si indentado"""
+    if indentado is None:
+        indentado = INDENTADO
+    if orjson is not None:
+        opciones = orjson.OPT_NON_STR_KEYS
+        if indentado:
+            opciones |= orjson.OPT_INDENT_2
+        if ordenar_claves:
+            opciones |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=opciones)
+    return volcar(obj, indentado, ordenar_claves).encode('utf-8')
+
+def volcar(obj, indentado=None, ordenar_claves=False):
+    """Serializa a str (mismo formato que volcar_bytes)"""
+    if indentado is None:
+        indentado = INDENTADO
+    if orjson is not None:
+        return volcar_bytes(obj, indentado, ordenar_claves).decode('utf-8')
+    if indentado:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=ordenar_claves)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=ordenar_claves)
+
+def cargar(ruta):
+    """Lee y decodifica un archivo JSON completo"""
+    with open(ruta, 'rb') as f:
+        return cargar_bytes(f.read())
+
+def guardar(ruta, obj, indentado=None):
+    """Escribe obj como JSON en ruta (compacto salvo indentado=True o NOTAS_JSON_INDENTADO)"""
+    with open(ruta, 'wb') as f:
+        f.write(volcar_bytes(obj, indentado))
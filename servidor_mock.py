@@ -0,0 +1,259 @@
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PALABRAS_PERMITIDAS = ['leyes', 'ley', 'comercio exterior', 'aduanas', 'aduana', 'turismo']
+FUENTES = ['Radio Fórmula', 'Televisa', 'TV Azteca', 'El Universal', 'Reforma', 'Milenio']
+PROGRAMAS = ['Noticiero Matutino', 'Despierta', 'Hechos', 'Primer Plano', 'En Punto', 'Aristegui', 'Así las cosas']
+VOCABULARIO = (
+    'gobierno secretaría economía mercancías importación exportación frontera operaciones arancel '
+    'reforma congreso senado diputados iniciativa decreto tratado socios comerciales inversión '
+    'empresas visitantes hoteles playas temporada ocupación aeropuerto vuelos crecimiento registro '
+    'autoridades fiscal recaudación contrabando revisión puerto terminal carga logística trámite'
+).split()
+
+def generar_notas(total, desde, dias, semilla=0, tamano_contenido=120, proporcion_duplicados=0.1, primer_id=1):
+    """Genera notas sintéticas deterministas repartidas por igual entre 'dias' días desde 'desde'
+
+    Una fracción de las notas son retransmisiones de una nota anterior en otro
+    programa con una palabra cambiada, para ejercitar la detección de casi duplicados.
+    """
+    rnd = random.Random(semilla)
+    inicio = date.fromisoformat(desde)
+    notas = []
+    for i in range(total):
+        dia = inicio + timedelta(days=i * dias // total)
+        hora = f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}:{rnd.randrange(60):02d}"
+
+        if notas and rnd.random() < proporcion_duplicados:
+            original = rnd.choice(notas[-50:])
+            palabras = original['contenido'].split()
+            palabras[rnd.randrange(len(palabras))] = rnd.choice(VOCABULARIO)
+            titulo, contenido, claves = original['titulo'], ' '.join(palabras), original['_palabras']
+        else:
+            claves = rnd.sample(PALABRAS_PERMITIDAS, rnd.randint(1, 2))
+            palabras = [rnd.choice(VOCABULARIO) for _ in range(tamano_contenido)]
+            for clave in claves:
+                palabras.insert(rnd.randrange(len(palabras)), clave)
+            titulo = f"{claves[0].capitalize()}: {' '.join(palabras[:8])}"
+            contenido = ' '.join(palabras)
+
+        notas.append({
+            'id': f"nota_{primer_id + i}",
+            'titulo': titulo,
+            'contenido': contenido,
+            'resumen': ' '.join(contenido.split()[:25]),
+            'fecha': f"{dia.isoformat()}T{hora}Z",
+            'fuente': rnd.choice(FUENTES),
+            'nombre_programa': rnd.choice(PROGRAMAS),
+            '_palabras': claves
+        })
+    return notas
+
+class ServidorMock:
+    """Sustituto local de /notas-api/notas con volumen, latencia y errores configurables
+
+    Implementa los parámetros de api-notas-openapi.yaml (palabras, fechaInicio,
+    fechaFin, limit) más 'page', y responde con el mismo sobre que la API real
+    (success, total, limit, filtros, metadata, notas). Comprime con gzip si el
+    cliente lo acepta. Cada petición espera latencia ± jitter segundos y falla
+    con probabilidad tasa_errores (503, o 429 con Retry-After). Las respuestas
+    200 llevan ETag y un If-None-Match que coincide recibe 304 sin cuerpo. Con
+    publicar_cada, cada tantos segundos se publica una nota nueva con la hora
+    actual (para probar la vigilancia continua).
+    """
+
+    def __init__(self, puerto=0, total_notas=5000, desde='2025-10-01', dias=22, latencia=0.02, jitter=0.01,
+                 tasa_errores=0.0, token=None, semilla=0, tamano_contenido=120, publicar_cada=None):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.tasa_errores = tasa_errores
+        self.token = token
+        self.rnd = random.Random(semilla)
+        self.notas = generar_notas(total_notas, desde, dias, semilla, tamano_contenido)
+        self.selecciones = {}
+        self.peticiones = 0
+        self.lock = threading.Lock()
+        self.semilla = semilla
+        self.tamano_contenido = tamano_contenido
+        self.publicar_cada = publicar_cada
+        self.publicando = threading.Event()
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                servidor.atender(self)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', puerto), Manejador)
+        self.httpd.daemon_threads = True
+        self.hilo = None
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/notas-api"
+
+    def iniciar(self):
+        """Arranca el servidor en un hilo y devuelve la URL base"""
+        self.hilo = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.hilo.start()
+        self.iniciar_publicacion()
+        return self.url_base
+
+    def iniciar_publicacion(self):
+        if self.publicar_cada:
+            threading.Thread(target=self._publicar_periodicamente, daemon=True).start()
+
+    def _publicar_periodicamente(self):
+        while not self.publicando.wait(self.publicar_cada):
+            self.publicar_nota()
+
+    def publicar_nota(self):
+        """Añade una nota nueva con la fecha y hora actuales y la devuelve"""
+        ahora = datetime.now(timezone.utc)
+        with self.lock:
+            nota = generar_notas(1, ahora.date().isoformat(), 1, self.semilla + len(self.notas),
+                                 self.tamano_contenido, proporcion_duplicados=0, primer_id=len(self.notas) + 1)[0]
+            nota['fecha'] = ahora.strftime('%Y-%m-%dT%H:%M:%SZ')
+            self.notas.append(nota)
+            self.selecciones = {}
+        return nota
+
+    def detener(self):
+        self.publicando.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def atender(self, peticion):
+        with self.lock:
+            self.peticiones += 1
+            espera = max(0.0, self.latencia + self.rnd.uniform(-self.jitter, self.jitter))
+            fallo = self.rnd.random() < self.tasa_errores
+            tipo_fallo = self.rnd.choice([429, 503])
+        time.sleep(espera)
+
+        url = urlparse(peticion.path)
+        if url.path.rstrip('/') != '/notas-api/notas':
+            return self.responder(peticion, 404, {'success': False, 'error': 'No encontrado'})
+        if self.token and peticion.headers.get('Authorization') != f"Bearer {self.token}":
+            return self.responder(peticion, 401, {'success': False, 'error': 'Token de acceso inválido'})
+        if fallo:
+            cabeceras = {'Retry-After': '1'} if tipo_fallo == 429 else {}
+            return self.responder(peticion, tipo_fallo, {'success': False, 'error': 'Error simulado'}, cabeceras)
+
+        params = parse_qs(url.query)
+        palabras = [p.strip().lower() for p in params.get('palabras', [''])[0].split(',') if p.strip()]
+        if not palabras or any(p not in PALABRAS_PERMITIDAS for p in palabras):
+            return self.responder(peticion, 400, {'success': False, 'error': 'Palabras no permitidas'})
+
+        try:
+            limit = min(int(params.get('limit', ['50'])[0]), 500)
+            page = max(int(params.get('page', ['1'])[0]), 1)
+        except ValueError:
+            return self.responder(peticion, 400, {'success': False, 'error': 'Parámetros inválidos'})
+        fecha_inicio = params.get('fechaInicio', [None])[0]
+        fecha_fin = params.get('fechaFin', [None])[0]
+
+        seleccion = self.seleccionar(palabras, fecha_inicio, fecha_fin)
+        pagina = [
+            {k: v for k, v in nota.items() if k != '_palabras'}
+            for nota in seleccion[(page - 1) * limit:page * limit]
+        ]
+        self.responder(peticion, 200, {
+            'success': True,
+            'total': len(seleccion),
+            'limit': limit,
+            'page': page,
+            'filtros': {
+                'fechaInicio': fecha_inicio,
+                'fechaFin': fecha_fin,
+                'palabrasBuscadas': palabras
+            },
+            'metadata': {
+                'baseDatos': {'actual': 'mock_actual', 'historica': 'mock_historica'},
+                'resultados': {'actual': len(seleccion), 'historica': 0}
+            },
+            'notas': pagina
+        })
+
+    def seleccionar(self, palabras, fecha_inicio, fecha_fin):
+        """Notas que cumplen los filtros; se memoriza por consulta para que paginar no sea O(total) por página"""
+        clave = (frozenset(palabras), fecha_inicio, fecha_fin)
+        # Bajo el lock: publicar_nota puede añadir notas y vaciar la memoria a la vez
+        with self.lock:
+            seleccion = self.selecciones.get(clave)
+            if seleccion is None:
+                buscadas = set(palabras)
+                seleccion = [
+                    nota for nota in self.notas
+                    if buscadas.intersection(nota['_palabras'])
+                    and (not fecha_inicio or nota['fecha'][:10] >= fecha_inicio)
+                    and (not fecha_fin or nota['fecha'][:10] <= fecha_fin)
+                ]
+                self.selecciones[clave] = seleccion
+        return seleccion
+
+    def responder(self, peticion, estado, cuerpo, cabeceras=None):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        if estado == 200:
+            etag = f'"{hashlib.sha256(datos).hexdigest()[:16]}"'
+            cabeceras = {**(cabeceras or {}), 'ETag': etag}
+            if peticion.headers.get('If-None-Match') == etag:
+                peticion.send_response(304)
+                peticion.send_header('ETag', etag)
+                peticion.send_header('Content-Length', '0')
+                peticion.end_headers()
+                return
+        peticion.send_response(estado)
+        peticion.send_header('Content-Type', 'application/json; charset=utf-8')
+        if 'gzip' in peticion.headers.get('Accept-Encoding', ''):
+            datos = gzip.compress(datos, compresslevel=5)
+            peticion.send_header('Content-Encoding', 'gzip')
+        for nombre, valor in (cabeceras or {}).items():
+            peticion.send_header(nombre, valor)
+        peticion.send_header('Content-Length', str(len(datos)))
+        peticion.end_headers()
+        peticion.wfile.write(datos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de notas")
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--notas', type=int, default=5000, help="Número de notas sintéticas")
+    parser.add_argument('--desde', default='2025-10-01', help="Primer día de las notas (YYYY-MM-DD)")
+    parser.add_argument('--dias', type=int, default=22, help="Días entre los que se reparten las notas")
+    parser.add_argument('--latencia', type=float, default=0.02, help="Latencia media por petición (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Variación máxima de la latencia (s)")
+    parser.add_argument('--errores', type=float, default=0.0, help="Proporción de peticiones que fallan")
+    parser.add_argument('--token', help="Si se indica, exige 'Authorization: Bearer <token>'")
+    parser.add_argument('--publicar-cada', type=float, help="Publicar una nota nueva de hoy cada tantos segundos")
+    args = parser.parse_args()
+
+    servidor = ServidorMock(args.puerto, args.notas, args.desde, args.dias, args.latencia, args.jitter,
+                            args.errores, args.token, publicar_cada=args.publicar_cada)
+    print(f"🧪 Servidor mock con {args.notas} notas en {servidor.url_base}")
+    print(f"   export NOTAS_API_URL={servidor.url_base}")
+    servidor.iniciar_publicacion()
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido")
@@ -0,0 +1,148 @@
+import requests
+import json
+import os
+from datetime import date, datetime
+
+import metricas
+import serializacion
+from catalogo_descargas import registrar_descarga
+from cliente_notas import ClienteNotas
+from descargar_noticias_paginadas import BASE_PARAMS, obtener_noticias
+from fragmentos_fechas import descargar_por_fragmentos
+
+ARCHIVO_DATOS = 'noticias_incrementales.json'
+ARCHIVO_MARCA = 'marca_de_agua.json'
+
+def guardar_json_atomico(ruta, datos):
+    """Escribe el JSON en un archivo temporal y lo renombra para no dejar archivos a medias"""
+    temporal = f"{ruta}.tmp"
+    with metricas.obtener().etapa('escritura'):
+        serializacion.guardar(temporal, datos)
+    os.replace(temporal, ruta)
+
+def cargar_marca_de_agua(archivo_marca=ARCHIVO_MARCA):
+    """Carga la marca de agua ({'ultima_fecha', 'ids_vistos'}) o None si es la primera ejecución"""
+    if not os.path.exists(archivo_marca):
+        return None
+    return serializacion.cargar(archivo_marca)
+
+def calcular_marca_de_agua(noticias, marca_anterior=None):
+    """Calcula la nueva marca de agua: la fecha más reciente y los ids vistos en ese día
+
+    Solo se guardan los ids del último día porque es el único que se vuelve a
+    consultar en la siguiente ejecución; así la marca no crece sin límite.
+    """
+    fechas = [nota['fecha'] for nota in noticias if nota.get('fecha')]
+    if marca_anterior:
+        fechas.append(marca_anterior['ultima_fecha'])
+    if not fechas:
+        return marca_anterior
+
+    ultima_fecha = max(fechas)
+    dia = ultima_fecha[:10]
+
+    # Si el último día no cambió, se conservan los ids que ya se habían visto en él
+    ids_vistos = set()
+    if marca_anterior and marca_anterior['ultima_fecha'][:10] == dia:
+        ids_vistos = set(marca_anterior['ids_vistos'])
+    ids_vistos |= {nota['id'] for nota in noticias if 'id' in nota and nota.get('fecha', '')[:10] == dia}
+
+    return {
+        'ultima_fecha': ultima_fecha,
+        'ids_vistos': sorted(ids_vistos),
+        'fecha_sincronizacion': datetime.now().isoformat()
+    }
+
+def sincronizar_incremental(archivo_datos=ARCHIVO_DATOS, archivo_marca=ARCHIVO_MARCA,
+                            max_workers=4, dias_por_fragmento=None):
+    """Descarga solo los días posteriores a la marca de agua y añade las notas nuevas al dataset
+
+    En la primera ejecución descarga el rango completo de BASE_PARAMS; después
+    consulta desde el día de la última 'fecha' vista hasta hoy y descarta las
+    notas cuyo 'id' ya figura en la marca de agua. Si no hay marca pero el
+    dataset ya existe, la marca se calcula a partir de sus notas y se descartan
+    todos sus ids, así no se duplican las notas ya descargadas.
+    """
+    marca = cargar_marca_de_agua(archivo_marca)
+    ids_existentes = set(marca['ids_vistos']) if marca else set()
+
+    # Cargar el dataset existente
+    datos = serializacion.cargar(archivo_datos) if os.path.exists(archivo_datos) else None
+    marca_del_dataset = marca is None and datos is not None
+    if marca_del_dataset:
+        ids_existentes = {nota['id'] for nota in datos['noticias'] if nota.get('id') is not None}
+        marca = calcular_marca_de_agua(datos['noticias'])
+
+    base_params = dict(BASE_PARAMS)
+    if marca:
+        base_params['fechaInicio'] = marca['ultima_fecha'][:10]
+        base_params['fechaFin'] = max(date.today().isoformat(), base_params['fechaInicio'])
+
+    print("🔄 Sincronización incremental de noticias...")
+    print("=" * 70)
+    if marca_del_dataset:
+        print(f"   📌 Sin marca de agua: se parte de {archivo_datos} ({len(ids_existentes)} ids, "
+              f"última fecha {marca['ultima_fecha'] if marca else 'desconocida'})")
+    elif marca:
+        print(f"   📌 Marca de agua: {marca['ultima_fecha']} ({len(marca['ids_vistos'])} ids vistos ese día)")
+    else:
+        print("   📌 Sin marca de agua: descarga inicial completa")
+    print(f"   📅 Rango a consultar: {base_params['fechaInicio']} a {base_params['fechaFin']}")
+
+    cliente = ClienteNotas(pool_size=max(max_workers, 1))
+    try:
+        if dias_por_fragmento:
+            noticias = descargar_por_fragmentos(cliente, base_params, dias_por_fragmento, max_workers=max_workers)
+        else:
+            noticias = obtener_noticias(cliente, base_params, max_workers)
+            if noticias is None:
+                return None
+
+        if datos is None:
+            datos = {'total': 0, 'parametros_busqueda': base_params, 'noticias': []}
+
+        nuevas = []
+        for nota in noticias:
+            nota_id = nota.get('id')
+            if nota_id is not None and nota_id in ids_existentes:
+                continue
+            if nota_id is not None:
+                ids_existentes.add(nota_id)
+            nuevas.append(nota)
+
+        print(f"\n   🆕 Noticias nuevas: {len(nuevas)} de {len(noticias)} consultadas")
+
+        if nuevas:
+            datos['noticias'].extend(nuevas)
+            datos['total'] = len(datos['noticias'])
+            datos['fecha_descarga'] = datetime.now().isoformat()
+            guardar_json_atomico(archivo_datos, datos)
+            print(f"   ✅ Dataset actualizado: {archivo_datos} ({datos['total']} noticias)")
+            registrar_descarga(archivo_datos, datos['parametros_busqueda'], datos['noticias'],
+                               origen='sincronizacion_incremental')
+
+        # La marca se escribe después del dataset: si algo falla antes, se reintenta el mismo rango
+        nueva_marca = calcular_marca_de_agua(nuevas, marca)
+        if nueva_marca:
+            guardar_json_atomico(archivo_marca, nueva_marca)
+            print(f"   📌 Nueva marca de agua: {nueva_marca['ultima_fecha']}")
+
+        return archivo_datos
+
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error en la petición: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"❌ Error al decodificar JSON: {e}")
+        return None
+    finally:
+        cliente.close()
+
+
+if __name__ == "__main__":
+    result = sincronizar_incremental()
+    metricas.escribir_informes()
+    if result:
+        print(f"\n🎉 ¡Sincronización completada! Archivo: {result}")
+    else:
+        print("\n❌ La sincronización falló")
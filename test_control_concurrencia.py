@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from cliente_notas import ClienteNotas
+from control_concurrencia import ControlAIMD
+from servidor_mock import ServidorMock
+
+def test_cola_lenta_no_reduce_el_limite():
+    """Muchos hilos esperando hueco ante un servidor rápido no cuentan como latencia alta"""
+
+    # 2 peticiones a la vez de ~0.05 s: los últimos de 16 hilos esperan ~0.4 s en la cola
+    control = ControlAIMD(inicial=2, maximo=2, latencia_objetivo=0.2)
+    with ServidorMock(total_notas=200, latencia=0.05, jitter=0.0) as servidor:
+        with ClienteNotas(url_base=servidor.url_base, control=control, reintentos=0) as cliente:
+            params = {'palabras': 'aduanas', 'limit': 10}
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                estados = list(executor.map(
+                    lambda page: cliente.get_con_reintentos({**params, 'page': page}).status_code,
+                    range(1, 17)
+                ))
+
+    print(f"📊 Estados: {set(estados)}, límite final: {control.limite:.2f}")
+    assert estados == [200] * 16
+    assert int(control.limite) == 2
+
+if __name__ == "__main__":
+    print("🚀 Probando el control de concurrencia contra el servidor simulado...")
+    test_cola_lenta_no_reduce_el_limite()
+    print("✅ El límite no baja por la espera en la cola")
@@ -0,0 +1,45 @@
+import functools
+import os
+import tempfile
+from pathlib import Path
+
+import serializacion
+import sincronizacion_incremental
+from cliente_notas import ClienteNotas
+from servidor_mock import ServidorMock
+
+def test_dataset_sin_marca_no_duplica(tmp_path):
+    """Sin marca de agua pero con el dataset ya descargado, las notas existentes no se vuelven a añadir"""
+
+    archivo_datos = str(tmp_path / 'noticias_incrementales.json')
+    archivo_marca = str(tmp_path / 'marca_de_agua.json')
+    cliente_original = sincronizacion_incremental.ClienteNotas
+    directorio_original = os.getcwd()
+    with ServidorMock(total_notas=300, latencia=0.0, jitter=0.0) as servidor:
+        sincronizacion_incremental.ClienteNotas = functools.partial(ClienteNotas, url_base=servidor.url_base)
+        # El catálogo de descargas se escribe en la carpeta actual
+        os.chdir(tmp_path)
+        try:
+            sincronizacion_incremental.sincronizar_incremental(archivo_datos, archivo_marca)
+            total_inicial = serializacion.cargar(archivo_datos)['total']
+
+            # Un dataset descargado antes de usar la marca de agua
+            os.remove(archivo_marca)
+            sincronizacion_incremental.sincronizar_incremental(archivo_datos, archivo_marca)
+        finally:
+            os.chdir(directorio_original)
+            sincronizacion_incremental.ClienteNotas = cliente_original
+
+    datos = serializacion.cargar(archivo_datos)
+    ids = [nota['id'] for nota in datos['noticias']]
+    print(f"📊 {total_inicial} noticias tras la primera sincronización, {datos['total']} tras la segunda")
+    assert total_inicial > 0
+    assert datos['total'] == total_inicial
+    assert len(ids) == len(set(ids))
+    assert os.path.exists(archivo_marca)
+
+if __name__ == "__main__":
+    print("🚀 Probando la sincronización incremental contra el servidor simulado...")
+    with tempfile.TemporaryDirectory() as carpeta:
+        test_dataset_sin_marca_no_duplica(Path(carpeta))
+    print("✅ El dataset existente no se duplica")
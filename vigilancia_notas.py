@@ -0,0 +1,232 @@
+import argparse
+import math
+import os
+import time
+from datetime import date, timedelta
+
+import requests
+
+import metricas
+import serializacion
+from almacen_sqlite import AlmacenNotas
+from cliente_notas import ClienteNotas
+from descargar_noticias_paginadas import BASE_PARAMS
+from planificador_consultas import normalizar_palabras
+
+# Segundos entre sondeos (se puede cambiar con NOTAS_VIGILANCIA_INTERVALO)
+INTERVALO = float(os.environ.get('NOTAS_VIGILANCIA_INTERVALO', '60'))
+ARCHIVO_ESTADO = 'vigilancia_estado.json'
+LIMIT = 500
+# Tras varios sondeos fallidos seguidos, la espera llega como mucho a este múltiplo del intervalo
+MAX_ESPERA_FALLOS = 8
+
+class SalidaNDJSON:
+    """Añade las notas nuevas al final de un archivo NDJSON"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, 'ab')
+
+    def emitir(self, notas):
+        self.archivo.writelines(serializacion.volcar_bytes(nota, indentado=False) + b'\n' for nota in notas)
+        self.archivo.flush()
+
+    def close(self):
+        self.archivo.close()
+
+class SalidaSQLite:
+    """Inserta las notas nuevas en un almacén SQLite (ver almacen_sqlite.py)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.almacen = AlmacenNotas(ruta)
+
+    def emitir(self, notas):
+        self.almacen.insertar_notas(notas)
+
+    def close(self):
+        self.almacen.close()
+
+class SalidaConsola:
+    """Muestra fecha, fuente y título de cada nota nueva"""
+
+    ruta = '-'
+
+    def emitir(self, notas):
+        for nota in notas:
+            print(f"   📰 {str(nota.get('fecha', ''))[:19]} [{nota.get('fuente', '?')}] "
+                  f"{str(nota.get('titulo', 'Sin título'))[:80]}")
+
+    def close(self):
+        pass
+
+def crear_salida(destino):
+    """'-' para la consola, .db/.sqlite para SQLite y cualquier otra ruta para NDJSON"""
+    if destino == '-':
+        return SalidaConsola()
+    if destino.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SalidaSQLite(destino)
+    return SalidaNDJSON(destino)
+
+class VigilanteNotas:
+    """Sondea la API para el día actual y emite a la salida solo las notas no vistas
+
+    Cada página se pide de forma condicional (ETag / Last-Modified si el
+    servidor los envía, o el SHA-256 del cuerpo si no): si la primera página no
+    cambió, el 'total' tampoco y el sondeo termina con una sola petición sin
+    cuerpo. Si cambió, se piden las demás páginas (también condicionales) y se
+    emiten las notas cuyo 'id' no se había visto. Con dias_atras se vigilan
+    también los días anteriores (para notas publicadas tarde). El estado (ids
+    vistos y validadores) se guarda en archivo_estado para no repetir notas al
+    reiniciar.
+    """
+
+    def __init__(self, cliente, base_params, salida, dias_atras=0, archivo_estado=ARCHIVO_ESTADO,
+                 emitir_existentes=True, limit=LIMIT):
+        self.cliente = cliente
+        self.base_params = {k: v for k, v in base_params.items() if k not in ('limit', 'page')}
+        self.salida = salida
+        self.dias_atras = dias_atras
+        self.archivo_estado = archivo_estado
+        self.emitir_existentes = emitir_existentes
+        self.limit = limit
+        self.vistos = {}  # id -> día de la nota
+        self.validadores = {}  # página -> validadores de su última respuesta
+        self.desde = None
+        self.sondeos = 0
+        self._cargar_estado()
+
+    def _cargar_estado(self):
+        if self.archivo_estado and os.path.exists(self.archivo_estado):
+            estado = serializacion.cargar(self.archivo_estado)
+            self.vistos = estado.get('vistos', {})
+            self.validadores = estado.get('validadores', {})
+            self.desde = estado.get('desde')
+            self.emitir_existentes = True  # Ya hay notas vistas: lo que falte es nuevo
+
+    def _guardar_estado(self):
+        if not self.archivo_estado:
+            return
+        temporal = f"{self.archivo_estado}.tmp"
+        serializacion.guardar(temporal, {
+            'desde': self.desde,
+            'vistos': self.vistos,
+            'validadores': self.validadores
+        })
+        os.replace(temporal, self.archivo_estado)
+
+    def _cambiar_de_dia(self, desde):
+        """Al cambiar la ventana se olvidan los ids anteriores a ella y los validadores"""
+        self.vistos = {nota_id: dia for nota_id, dia in self.vistos.items() if dia >= desde}
+        self.validadores = {}
+        self.desde = desde
+
+    def _pedir(self, params, page):
+        datos, self.validadores[str(page)] = self.cliente.obtener_si_cambio(
+            {**params, 'limit': self.limit, 'page': page}, self.validadores.get(str(page))
+        )
+        if datos is None:
+            return None
+        if isinstance(datos, list):
+            return {'notas': datos, 'total': len(datos)}
+        return datos
+
+    def sondear(self):
+        """Hace un sondeo y devuelve la lista de notas nuevas emitidas"""
+        hoy = date.today()
+        desde = (hoy - timedelta(days=self.dias_atras)).isoformat()
+        if desde != self.desde:
+            self._cambiar_de_dia(desde)
+        params = {**self.base_params, 'fechaInicio': desde, 'fechaFin': hoy.isoformat()}
+        self.sondeos += 1
+        registro = metricas.obtener()
+        registro.contar('sondeos')
+
+        primera = self._pedir(params, 1)
+        if primera is None:
+            registro.contar('sondeos_sin_cambios')
+            return []
+
+        paginas = [primera['notas']]
+        total_paginas = math.ceil(primera.get('total', len(primera['notas'])) / self.limit)
+        for page in range(2, total_paginas + 1):
+            datos = self._pedir(params, page)
+            if datos is not None:
+                paginas.append(datos['notas'])
+
+        nuevas = []
+        for notas in paginas:
+            for nota in notas:
+                nota_id = nota.get('id')
+                if nota_id is None or str(nota_id) in self.vistos:
+                    continue
+                self.vistos[str(nota_id)] = str(nota.get('fecha') or hoy.isoformat())[:10]
+                nuevas.append(nota)
+
+        if nuevas and self.emitir_existentes:
+            self.salida.emitir(nuevas)
+            registro.contar('notas_nuevas', len(nuevas))
+        emitidas = nuevas if self.emitir_existentes else []
+        self.emitir_existentes = True
+        # El estado se guarda después de emitir: si algo falla, las notas se vuelven a emitir
+        self._guardar_estado()
+        return emitidas
+
+    def vigilar(self, intervalo=INTERVALO, max_sondeos=None):
+        """Sondea cada 'intervalo' segundos hasta Ctrl+C (o hasta max_sondeos)
+
+        Un sondeo fallido (de red, un JSON inválido o cualquier otro error) se
+        muestra y no detiene la vigilancia; tras fallos seguidos la espera se
+        duplica hasta MAX_ESPERA_FALLOS veces el intervalo. Solo Ctrl+C la detiene.
+        """
+        fallos = 0
+        while max_sondeos is None or self.sondeos < max_sondeos:
+            inicio = time.monotonic()
+            try:
+                nuevas = self.sondear()
+                fallos = 0
+                if nuevas:
+                    print(f"🆕 {time.strftime('%H:%M:%S')} {len(nuevas)} notas nuevas -> {self.salida.ruta}")
+                else:
+                    print(f"💤 {time.strftime('%H:%M:%S')} Sin cambios ({len(self.vistos)} notas vistas)")
+            except Exception as e:
+                fallos += 1
+                metricas.obtener().contar('sondeos_fallidos')
+                if isinstance(e, requests.exceptions.RequestException):
+                    print(f"⚠️  {time.strftime('%H:%M:%S')} Error en el sondeo: {e}")
+                else:
+                    print(f"❌ {time.strftime('%H:%M:%S')} Error inesperado en el sondeo: {type(e).__name__}: {e}")
+            if max_sondeos is not None and self.sondeos >= max_sondeos:
+                break
+            espera = intervalo * min(2 ** max(fallos - 1, 0), MAX_ESPERA_FALLOS)
+            if fallos:
+                print(f"   ⏳ Siguiente sondeo en {espera:g} s ({fallos} fallo(s) seguidos)")
+            time.sleep(max(0.0, espera - (time.monotonic() - inicio)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vigila la API y emite solo las notas nuevas del día")
+    parser.add_argument('--salida', default='-', help="'-' (consola), archivo .ndjson o base .db (default: consola)")
+    parser.add_argument('--palabras', default=BASE_PARAMS['palabras'], help="Palabras a vigilar, separadas por comas")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO, help="Segundos entre sondeos")
+    parser.add_argument('--dias-atras', type=int, default=0, help="Vigilar también los N días anteriores")
+    parser.add_argument('--estado', default=ARCHIVO_ESTADO, help="Archivo donde se guardan los ids vistos")
+    parser.add_argument('--solo-nuevas', action='store_true',
+                        help="No emitir las notas que ya existen al arrancar por primera vez")
+    parser.add_argument('--sondeos', type=int, help="Terminar tras este número de sondeos")
+    args = parser.parse_args()
+
+    base_params = {'palabras': ', '.join(normalizar_palabras(args.palabras))}
+    salida = crear_salida(args.salida)
+    cliente = ClienteNotas(pool_size=1)
+    vigilante = VigilanteNotas(cliente, base_params, salida, args.dias_atras, args.estado,
+                               emitir_existentes=not args.solo_nuevas)
+    print(f"👀 Vigilando '{base_params['palabras']}' cada {args.intervalo:g} s (Ctrl+C para salir)")
+    try:
+        vigilante.vigilar(args.intervalo, args.sondeos)
+    except KeyboardInterrupt:
+        print("\n👋 Vigilancia detenida")
+    finally:
+        salida.close()
+        cliente.close()
+        metricas.escribir_informes()